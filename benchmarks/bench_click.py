@@ -0,0 +1,56 @@
+"""Storm lookup latency on click: full-column scan vs the Key -> row range table.
+
+    python benchmarks/bench_click.py [--clicks 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'dashboard'))
+
+import numpy as np
+
+from core import store
+
+
+# Ancienne version du callback: re-cast + strip de la colonne Key, puis masque booléen
+def lookup_scan(df, key):
+    keys = df['Key'].astype(str).str.strip()
+    return df[keys == key]
+
+
+def lookup_index(df, key):
+    return store.storm_track(key)
+
+
+def time_lookups(lookup, df, keys):
+    timings = []
+    for key in keys:
+        t0 = time.perf_counter()
+        lookup(df, key)
+        timings.append(time.perf_counter() - t0)
+    return np.array(timings) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clicks', type=int, default=200)
+    args = parser.parse_args()
+
+    df = store.tracks()
+    all_keys = store.starts()['Key'].astype(str).to_numpy()
+    keys = np.random.default_rng(0).choice(all_keys, size=args.clicks)
+
+    for key in keys[:20]:
+        assert lookup_scan(df, key)['DateTime'].equals(lookup_index(df, key)['DateTime'])
+
+    print(f'{len(df)} rows, {len(all_keys)} storms, {args.clicks} clicks')
+    print(f"{'lookup':<10}{'median us':>12}{'p95 us':>12}")
+    for name, lookup in (('scan', lookup_scan), ('index', lookup_index)):
+        timings = time_lookups(lookup, df, keys)
+        print(f'{name:<10}{np.median(timings):>12.1f}{np.percentile(timings, 95):>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Peak memory of the chunked CSV ingestion, on the bundled data or a scaled copy of it.
+
+    python benchmarks/bench_ingest.py [--scale 10] [--chunk-rows 20000]
+
+Each file is ingested in a fresh interpreter so its peak RSS is not hidden by memory the
+previous file left in the allocator. Exits non-zero when a peak goes over the budget
+(HURRICANE_INGEST_MAX_RSS_RATIO times the typed frame size, plus
+HURRICANE_INGEST_RSS_ALLOWANCE_MB).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DASHBOARD_DIR = os.path.join(ROOT, 'dashboard')
+
+CHILD = '''
+import json, sys, time
+sys.path.insert(0, {dashboard!r})
+from core import ingest, store
+t0 = time.perf_counter()
+store._parse_basin({path!r})
+report = dict(ingest.reports[{path!r}], seconds=time.perf_counter() - t0)
+print(json.dumps(report))
+'''
+
+
+# Copie du CSV répétée `scale` fois (l'en-tête une seule fois)
+def scaled_copy(path, scale, directory):
+    target = os.path.join(directory, os.path.basename(path))
+    with open(path, 'rb') as f:
+        header = f.readline()
+        body = f.read()
+    with open(target, 'wb') as f:
+        f.write(header)
+        for _ in range(scale):
+            f.write(body)
+    return target
+
+
+def run_child(path, env):
+    out = subprocess.run([sys.executable, '-c', CHILD.format(dashboard=DASHBOARD_DIR, path=path)],
+                         env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scale', type=int, default=1)
+    parser.add_argument('--chunk-rows', type=int)
+    args = parser.parse_args()
+
+    env = dict(os.environ, HURRICANE_CACHE='0')
+    if args.chunk_rows:
+        env['HURRICANE_INGEST_CHUNK_ROWS'] = str(args.chunk_rows)
+    over_budget = False
+    with tempfile.TemporaryDirectory() as directory:
+        for basin in ('AL', 'EP'):
+            path = os.path.join(ROOT, 'data', f'{basin}.csv')
+            if args.scale > 1:
+                path = scaled_copy(path, args.scale, directory)
+            report = run_child(path, env)
+            over_budget |= report['over_budget']
+            print(f"{basin} x{args.scale}: {report['rows_read']} rows read, {report['rows_kept']} kept, "
+                  f"{report['chunks']} chunks (last {report['chunk_rows']} rows), {report['seconds']:.2f}s, "
+                  f"frame {report['frame_bytes'] / 2**20:.1f} MB, "
+                  f"peak RSS +{(report['peak_rss_bytes'] or 0) / 2**20:.1f} MB "
+                  f"(budget {report['max_rss_bytes'] / 2**20:.1f} MB)")
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == '__main__':
+    main()
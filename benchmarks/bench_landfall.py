@@ -0,0 +1,77 @@
+"""Landfall detection on the full archive: vectorized engine vs a per-storm loop.
+
+    python benchmarks/bench_landfall.py [--new 50]
+
+Times a full detection (every storm), an update with nothing new (persisted results)
+and an update after forgetting the last --new storms, and checks every run finds the
+same landfalls. The per-storm loop is the straightforward shapely version, for scale.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+DASHBOARD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'dashboard')
+sys.path.insert(0, DASHBOARD_DIR)
+
+import numpy as np  # noqa: E402
+import shapely  # noqa: E402
+
+from core import cache, landfall, store  # noqa: E402
+
+
+def timed(function, *args):
+    t0 = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - t0
+
+
+# Une LineString par ouragan, testée contre chaque polygone candidat, en Python
+def per_storm_loop(tracks, offsets):
+    polygons, _, tree = landfall._load_land()
+    storms = 0
+    for first, stop in zip(offsets[:-1], offsets[1:]):
+        if stop - first < 2:
+            continue
+        line = shapely.LineString(np.column_stack([tracks['Lon'].to_numpy()[first:stop],
+                                                   tracks['Lat'].to_numpy()[first:stop]]))
+        storms += any(line.intersects(polygons[i]) for i in tree.query(line))
+    return storms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--new', type=int, default=50)
+    args = parser.parse_args()
+
+    cache.CACHE_DIR = tempfile.mkdtemp()
+    tracks = store.tracks()
+    _, offsets = store.storm_index()
+    _, load = timed(landfall._load_land)
+    full, detect = timed(landfall.detect, tracks, offsets, np.arange(len(offsets) - 1))
+    (first, _), cold = timed(landfall._update)
+    _, warm = timed(landfall._update)
+
+    # Oublie les derniers ouragans traités, comme si de nouvelles données étaient arrivées
+    _, storms_path, _ = landfall._paths()
+    processed = cache.read_frame(storms_path)
+    cache.write_frame(storms_path, processed.iloc[:-args.new])
+    (incremental, _), update = timed(landfall._update)
+
+    _, loop = timed(per_storm_loop, tracks, offsets)
+    same = full.sort_values(['storm_code', 'row'], ignore_index=True).equals(first) and first.equals(incremental)
+    print(f'{len(offsets) - 1} storms, {len(tracks)} points, {len(full)} landfalls '
+          f'in {full["storm_code"].nunique()} storms')
+    print(f'load world.shp + STRtree: {load * 1000:.0f} ms')
+    print(f'detect, every storm:      {detect * 1000:.0f} ms')
+    print(f'update, nothing cached:   {cold * 1000:.0f} ms (detect + persist)')
+    print(f'update, nothing new:      {warm * 1000:.0f} ms')
+    print(f'update, {args.new} new storms:    {update * 1000:.0f} ms')
+    print(f'per-storm loop (intersects only): {loop * 1000:.0f} ms')
+    print(f'results identical: {same}')
+    sys.exit(0 if same else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+"""Refresh of the data without restart: incremental update vs a fresh load.
+
+    python benchmarks/bench_refresh.py [--scale 10] [--storms 5] [--points 4]
+
+Works on a copy of the data (bundled or scaled, see suite.synthetic_data). One process
+loads the store and every structure derived from it, then goes through three changes
+of the CSVs, each picked up by store.reload():
+
+- append: --points new advisories for the latest storm of each basin and --storms new
+  storms in each basin, appended at the end of the files as POST /ingest does;
+- rewrite: the wind of a landfall point in the middle of EP.csv edited in place;
+- remove: one storm deleted from AL.csv.
+
+After each change it times the reload and the update of every derived structure, and
+a fresh process loads the changed files from scratch: both must give the same data,
+aggregates, density grid, summaries, starting points, landfalls and trend. Exits
+non-zero when they differ.
+"""
+import argparse
+import csv
+import io
+import math
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from suite import DASHBOARD_DIR, synthetic_data
+
+STEPS = ('append', 'rewrite', 'remove')
+DERIVED = ('aggregates._yearly', 'aggregates._temperature', 'density._grid', 'summary._storms', 'lod._index',
+           'spatial._segments', 'landfall._events')
+
+CHILD = r'''
+import hashlib, os, pickle, sys, time
+sys.path.insert(0, {dashboard!r})
+import numpy as np
+import pandas as pd
+from core import aggregates, density, landfall, lod, spatial, stats, store, summary
+
+
+def timed(function, *args):
+    t0 = time.perf_counter()
+    function(*args)
+    return (time.perf_counter() - t0) * 1000
+
+
+# Toutes les structures dérivées, construites ou mises à jour pour la version courante
+def derive():
+    times = {{name: timed(eval(name).get) for name in {derived!r}}}
+    times['stats.temperature_trend'] = timed(stats.temperature_trend)
+    return times
+
+
+def by_storm(df):
+    return df.sort_values('storm_code', kind='stable', ignore_index=True)
+
+
+# Résultats indépendants de l'ordre des ouragans de même date de genèse
+def results():
+    tracks = store.tracks()
+    starts = store.starts()
+    codes, offsets = store.storm_index()
+    # L'index doit correspondre aux lignes: un bloc par ouragan, par date de genèse
+    assert (tracks['Key'].to_numpy()[offsets[:-1]] == starts['Key'].to_numpy()).all()
+    assert (np.diff(tracks['Key'].cat.codes.to_numpy()) != 0).sum() == len(starts) - 1
+    assert (np.diff(starts['DateTime'].to_numpy()) >= np.timedelta64(0)).all()
+    order = np.argsort(tracks['Key'].astype(str).to_numpy(), kind='stable')
+    hashes = pd.util.hash_pandas_object(tracks.take(order), index=False).to_numpy()
+    first_year, last_year = store.year_bounds()
+    points, clusters = lod.starting_points(first_year, last_year)
+    return {{
+        'storms': len(starts),
+        'tracks': hashlib.blake2b(hashes.tobytes()).hexdigest(),
+        'starts': by_storm(starts[['Key', 'DateTime', 'Lat', 'Lon', 'hover', 'storm_code']]),
+        'yearly_by_basin': aggregates.yearly_by_basin(),
+        'yearly': aggregates.yearly(),
+        'temperature_vs_count': aggregates.temperature_vs_count(),
+        'density': [density.counts_between(first, last_year) for first in (first_year, last_year - 10)],
+        'summary': by_storm(summary.storms()),
+        'landfalls': landfall.landfalls().sort_values(['storm_code', 'row'], ignore_index=True),
+        'starting_points': by_storm(points[['Key', 'storm_code']]) if clusters is None else clusters,
+        'trend': stats.temperature_trend(),
+    }}
+
+
+def save(path, times=None):
+    with open(path, 'wb') as f:
+        pickle.dump({{'times': times, 'results': results()}}, f)
+
+
+if {refresher!r}:
+    load = timed(store.tracks)
+    save(os.path.join({work!r}, 'load.pkl'), dict(derive(), **{{'store.reload': load}}))
+    print(len(store.starts()), len(store.tracks()), flush=True)
+    # Le processus parent modifie les fichiers entre deux étapes
+    for step in sys.stdin:
+        step = step.strip()
+        times = {{'store.reload': timed(store.reload)}}
+        times.update(derive())
+        save(os.path.join({work!r}, f'{{step}}.pkl'), times)
+        print(step, flush=True)
+else:
+    store.tracks()
+    save(os.path.join({work!r}, 'fresh.pkl'))
+'''
+
+
+def child(work, data_dir, cache_dir, refresher):
+    env = dict(os.environ, HURRICANE_DATA_DIR=data_dir, HURRICANE_CACHE_DIR=cache_dir, HURRICANE_CACHE='1',
+               HURRICANE_REFRESH_SECONDS='0', HURRICANE_FAST_STARTUP='0')
+    env.pop('HURRICANE_SNAPSHOT_DIR', None)
+    code = CHILD.format(dashboard=DASHBOARD_DIR, derived=DERIVED, refresher=refresher, work=work)
+    return subprocess.Popen([sys.executable, '-c', code], cwd=DASHBOARD_DIR, env=env, stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE, text=True)
+
+
+def load(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def _lines(path):
+    with open(path, newline='') as f:
+        return f.readlines()
+
+
+def _replace(path, lines):
+    with open(f'{path}.tmp', 'w', newline='') as f:
+        f.writelines(lines)
+    os.replace(f'{path}.tmp', path)
+
+
+def _fields(line):
+    return next(csv.reader([line]))
+
+
+def _line(fields):
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='\n').writerow(fields)
+    return buffer.getvalue()
+
+
+def _csv_value(value):
+    if isinstance(value, pd.Timestamp):
+        return value.strftime('%Y-%m-%dT%H:%M:%SZ')
+    if isinstance(value, float) and math.isnan(value) or value is None:
+        return ''
+    return str(value)
+
+
+def append(data_dir, storms, points):
+    for basin in ('AL', 'EP'):
+        path = os.path.join(data_dir, f'{basin}.csv')
+        df = pd.read_csv(path, usecols=['Key', 'Name', 'DateTime', 'Record', 'Status', 'Lat', 'Lon', 'Wind',
+                                        'Pressure'], dtype={'Key': str, 'Name': str, 'Record': str, 'Status': str})
+        df['Key'] = df['Key'].str.strip()
+        df['DateTime'] = pd.to_datetime(df['DateTime'])
+        last = df[df['Key'] == df.loc[df['DateTime'].idxmax(), 'Key']].reset_index(drop=True)
+        # Nouveaux points dans le prolongement de la trajectoire de l'ouragan le plus récent
+        advisories = last.iloc[[-1] * points].assign(
+            DateTime=last['DateTime'].iloc[-1] + pd.to_timedelta(np.arange(1, points + 1) * 6, unit='h'),
+            Lat=last['Lat'].iloc[-1] + np.arange(1, points + 1) * 0.3)
+        # Nouveaux ouragans: la même trajectoire décalée, la même année
+        copies = [last.assign(Key=f'{last["Key"][0][:2]}{90 + i:02d}{last["Key"][0][4:]}', Lat=last['Lat'] + 1 + i)
+                  for i in range(storms)]
+        rows = pd.concat([advisories] + copies, ignore_index=True)
+        with open(path) as f:
+            header = _fields(f.readline())
+        # Une seule écriture en fin de fichier, comme refresh.append_rows
+        with open(path, 'a') as f:
+            f.write(''.join(_line([_csv_value(row.get(column)) for column in header])
+                            for row in rows.to_dict('records')))
+
+
+def rewrite(data_dir):
+    path = os.path.join(data_dir, 'EP.csv')
+    lines = _lines(path)
+    header = _fields(lines[0])
+    wind, record, time = header.index('Wind'), header.index('Record'), header.index('DateTime')
+    # Point d'un landfall (Record 'L'): le vent interpolé à la côte change aussi
+    middle = len(lines) // 2
+    while not (_fields(lines[middle])[wind] and _fields(lines[middle])[record].strip() == 'L'
+               and _fields(lines[middle])[time] >= '1950'):
+        middle += 1
+    fields = _fields(lines[middle])
+    # Même longueur: le fichier garde sa taille et sa fin, seul son contenu change
+    fields[wind] = ('2' if fields[wind][0] == '1' else '1') + fields[wind][1:]
+    lines[middle] = _line(fields)
+    _replace(path, lines)
+
+
+def remove(data_dir):
+    path = os.path.join(data_dir, 'AL.csv')
+    lines = _lines(path)
+    header = _fields(lines[0])
+    key, time = header.index('Key'), header.index('DateTime')
+    # Un ouragan gardé par le store (les points d'avant MIN_YEAR sont ignorés)
+    middle = len(lines) // 2
+    while _fields(lines[middle])[time] < '1950':
+        middle += 1
+    removed = _fields(lines[middle])[key]
+    _replace(path, lines[:1] + [line for line in lines[1:] if _fields(line)[key] != removed])
+
+
+def _close(before, after):
+    if isinstance(before, pd.DataFrame):
+        before, after = before.reset_index(drop=True), after.reset_index(drop=True)
+        for df in (before, after):
+            for column in df.columns:
+                if isinstance(df[column].dtype, pd.CategoricalDtype):
+                    df[column] = df[column].astype(str)
+        try:
+            pd.testing.assert_frame_equal(before, after, check_dtype=False, rtol=1e-5)
+        except AssertionError:
+            return False
+        return True
+    if isinstance(before, dict):
+        return before.keys() == after.keys() and all(_close(before[k], after[k]) for k in before)
+    if isinstance(before, (list, tuple)):
+        return len(before) == len(after) and all(_close(b, a) for b, a in zip(before, after))
+    if isinstance(before, np.ndarray):
+        # Cellules de la grille de densité: l'ordre des cellules vides ne compte pas
+        return before.shape == after.shape and np.allclose(before, after, rtol=1e-5, equal_nan=True)
+    if isinstance(before, float):
+        return math.isclose(before, after, rel_tol=1e-5) or math.isnan(before) and math.isnan(after)
+    return before == after
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=int, default=10)
+    parser.add_argument('--storms', type=int, default=5)
+    parser.add_argument('--points', type=int, default=4)
+    args = parser.parse_args()
+
+    source = synthetic_data(args.scale)
+    mismatches = []
+    with tempfile.TemporaryDirectory() as work:
+        data_dir = os.path.join(work, 'data')
+        os.makedirs(data_dir)
+        for name in os.listdir(source):
+            if name.endswith(('.csv', '.shp', '.shx')):
+                shutil.copy(os.path.join(source, name), data_dir)
+        for name in ('world.shp', 'world.shx'):
+            if not os.path.exists(os.path.join(data_dir, name)):
+                shutil.copy(os.path.join(os.path.dirname(DASHBOARD_DIR), 'data', name), data_dir)
+
+        refresher = child(work, data_dir, os.path.join(work, 'cache'), True)
+        storms, points = refresher.stdout.readline().split()
+        rows = {'load': load(os.path.join(work, 'load.pkl'))['times']}
+        changes = {'append': lambda: append(data_dir, args.storms, args.points),
+                   'rewrite': lambda: rewrite(data_dir), 'remove': lambda: remove(data_dir)}
+        try:
+            for step in STEPS:
+                changes[step]()
+                refresher.stdin.write(step + '\n')
+                refresher.stdin.flush()
+                if refresher.stdout.readline().strip() != step:
+                    sys.exit(f'{step}: the refreshing process failed')
+                refreshed = load(os.path.join(work, f'{step}.pkl'))
+                fresh = child(work, data_dir, tempfile.mkdtemp(dir=work), False)
+                if fresh.wait():
+                    sys.exit(f'{step}: the fresh process failed')
+                expected = load(os.path.join(work, 'fresh.pkl'))['results']
+                rows[step] = refreshed['times']
+                mismatches += [f'{step}: {name}' for name in expected
+                               if not _close(refreshed['results'][name], expected[name])]
+        finally:
+            refresher.stdin.close()
+            refresher.wait()
+
+    print(f'x{args.scale}: {storms} storms, {points} points; times in ms, load = full build')
+    print(f"{'':<26}" + ''.join(f'{step:>10}' for step in rows))
+    for name in ('store.reload',) + DERIVED + ('stats.temperature_trend',):
+        print(f'{name:<26}' + ''.join(f'{times[name]:>10.1f}' for times in rows.values()))
+    print(f"results identical to a fresh load: {not mismatches}")
+    for mismatch in mismatches:
+        print(f'  differs after {mismatch}')
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
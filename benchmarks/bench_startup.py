@@ -0,0 +1,67 @@
+"""Cold vs warm start of the data layer, each run in a fresh interpreter.
+
+    python benchmarks/bench_startup.py [--repeat 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+DASHBOARD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'dashboard')
+
+# Ce qui tourne dans chaque sous-processus: imports puis chargement complet du store
+CHILD = '''
+import json, sys, time
+sys.path.insert(0, {dashboard!r})
+t0 = time.perf_counter()
+import pandas
+try:
+    import pyarrow.feather
+except ImportError:
+    pass
+t1 = time.perf_counter()
+from core import store
+store.tracks(); store.temperatures()
+t2 = time.perf_counter()
+print(json.dumps({{'imports': t1 - t0, 'load': t2 - t1}}))
+'''
+
+
+def run_child(env):
+    out = subprocess.run([sys.executable, '-c', CHILD.format(dashboard=DASHBOARD_DIR)],
+                         env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def summarize(runs):
+    return {key: round(statistics.median(run[key] for run in runs) * 1000, 1) for key in runs[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    results = {}
+    env = dict(os.environ, HURRICANE_CACHE='0')
+    results['csv (no cache)'] = summarize([run_child(env) for _ in range(args.repeat)])
+
+    cold, warm = [], []
+    for _ in range(args.repeat):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, HURRICANE_CACHE='1', HURRICANE_CACHE_DIR=tmp)
+            cold.append(run_child(env))
+            warm.append(run_child(env))
+    results['cold (build cache)'] = summarize(cold)
+    results['warm (cache hit)'] = summarize(warm)
+
+    print(f"{'mode':<20}{'imports ms':>12}{'load ms':>10}")
+    for mode, timing in results.items():
+        print(f"{mode:<20}{timing['imports']:>12}{timing['load']:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""Memory of N dashboard workers: private data per worker vs one shared snapshot.
+
+    python benchmarks/bench_workers.py [--workers 1,2,4,8] [--scale 10]
+
+For every worker count, starts that many processes which import the app, build the
+initial figures of both pages and run a slider update, then keep running while their
+memory is read (psutil). "private": each worker loads the data itself, as separate
+gunicorn workers did; "shared": the data and its derived arrays are published once
+(refresh.publish) and the workers map the snapshot. PSS splits shared pages between
+the processes that map them, so the total PSS is the memory the workers really use
+together. "gunicorn" (when it is installed): the real server of gunicorn.conf.py, its
+workers measured once they have built the initial figures in the background.
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import psutil
+
+from suite import DASHBOARD_DIR, ROOT, synthetic_data
+
+try:
+    import gunicorn
+except ImportError:  # gunicorn is optional (not on Windows): its mode is skipped
+    gunicorn = None
+
+WORKER = r'''
+import os, sys
+sys.path.insert(0, {dashboard!r})
+os.chdir({dashboard!r})
+import inspect
+import app
+from core import store
+app.warm()
+inspect.unwrap(app.maps.update_output)(list(store.year_bounds()), None, None, None, None)
+print(store.stats()['shared'], flush=True)
+sys.stdin.readline()
+'''
+
+
+def measure(workers, env):
+    code = WORKER.format(dashboard=DASHBOARD_DIR)
+    processes = [subprocess.Popen([sys.executable, '-c', code], env=env, stdin=subprocess.PIPE,
+                                  stdout=subprocess.PIPE, text=True) for _ in range(workers)]
+    try:
+        shared = {process.stdout.readline().strip() for process in processes}
+        memory = [psutil.Process(process.pid).memory_full_info() for process in processes]
+    finally:
+        for process in processes:
+            process.communicate('\n')
+    return {'shared': shared, 'rss': sum(m.rss for m in memory), 'pss': sum(m.pss for m in memory),
+            'uss': sum(m.uss for m in memory) / len(memory)}
+
+
+def _idle(processes, seconds=1.0):
+    # Plus de temps CPU consommé: les figures initiales sont construites
+    before = [sum(process.cpu_times()[:2]) for process in processes]
+    time.sleep(seconds)
+    return all(sum(process.cpu_times()[:2]) - used < 0.01 for process, used in zip(processes, before))
+
+
+def measure_gunicorn(workers, env):
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    env = dict(env, WEB_CONCURRENCY=str(workers), HURRICANE_BIND=f'127.0.0.1:{port}')
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', os.path.join(DASHBOARD_DIR, 'gunicorn.conf.py')],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 300
+        while True:
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{port}/', timeout=5).read()
+                break
+            except OSError:
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise RuntimeError('gunicorn did not start')
+                time.sleep(0.5)
+        # Le processus de publication est aussi un enfant du maître
+        processes = [child for child in psutil.Process(server.pid).children()
+                     if 'refresh.publisher' not in ' '.join(child.cmdline())]
+        while not _idle(processes):
+            pass
+        memory = [process.memory_full_info() for process in processes]
+        shared = {str(any(region.path.startswith(env['HURRICANE_SNAPSHOT_DIR']) for region in process.memory_maps()))
+                  for process in processes}
+    finally:
+        server.terminate()
+        server.wait()
+    return {'shared': shared, 'rss': sum(m.rss for m in memory), 'pss': sum(m.pss for m in memory),
+            'uss': sum(m.uss for m in memory) / len(memory)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', default='1,2,4,8')
+    parser.add_argument('--scale', type=int, default=10)
+    args = parser.parse_args()
+
+    data_dir = synthetic_data(args.scale)
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        env = dict(os.environ, HURRICANE_DATA_DIR=data_dir, HURRICANE_FAST_STARTUP='0')
+        env.pop('HURRICANE_SNAPSHOT_DIR', None)
+        # Cache Feather construit une fois, pour que les deux modes partent des mêmes fichiers
+        subprocess.run([sys.executable, '-c', 'from core import refresh; refresh.publish(' + repr(snapshot_dir) + ')'],
+                       cwd=DASHBOARD_DIR, env=env, check=True)
+        modes = {'private': env, 'shared': dict(env, HURRICANE_SNAPSHOT_DIR=snapshot_dir)}
+        if gunicorn is not None:
+            modes['gunicorn'] = dict(env, HURRICANE_SNAPSHOT_DIR=os.path.join(snapshot_dir, 'gunicorn'))
+        print(f"x{args.scale}: {'mode':<9}{'workers':>8}{'total RSS MB':>14}{'total PSS MB':>14}{'USS/worker MB':>15}")
+        for mode, mode_env in modes.items():
+            for workers in (int(n) for n in args.workers.split(',')):
+                result = (measure_gunicorn if mode == 'gunicorn' else measure)(workers, mode_env)
+                assert result['shared'] == {str(mode != 'private')}, result['shared']
+                print(f"     {mode:<9}{workers:>8}{result['rss'] / 2**20:>14.0f}{result['pss'] / 2**20:>14.0f}"
+                      f"{result['uss'] / 2**20:>15.0f}")
+
+
+if __name__ == '__main__':
+    main()
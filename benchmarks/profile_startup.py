@@ -0,0 +1,120 @@
+"""Where the start of the dashboard goes, up to the first request of each page.
+
+    python benchmarks/profile_startup.py [--modes eager,fast] [--top 15]
+
+Runs the dashboard in a fresh interpreter under `python -X importtime`, once per mode
+(eager: default, data and initial figures built in the background at start; fast:
+HURRICANE_FAST_STARTUP=1), and prints:
+- the wall-clock steps from the launch of the process: interpreter, import of dash,
+  import of app.py (Dash app and page modules), first request of the index, then the
+  first visit of every page through the Dash pages callback
+- the startup spans recorded by core.startup (data loads and first figure builds),
+  with the thread they ran in (the eager mode builds in a background thread)
+- the import time of the top-level packages (self time of all their modules)
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+DASHBOARD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'dashboard')
+MODES = {'eager': {'HURRICANE_FAST_STARTUP': '0'}, 'fast': {'HURRICANE_FAST_STARTUP': '1'}}
+
+# Processus mesuré: mêmes étapes qu'un navigateur qui ouvre le dashboard puis chaque page
+CHILD = r'''
+import json, os, sys, time
+child_start = time.perf_counter()
+launched = time.time() - float(os.environ['PROFILE_LAUNCHED'])
+steps = [('interpreter', launched)]
+
+def step(name, func):
+    t0 = time.perf_counter()
+    result = func()
+    steps.append((name, time.perf_counter() - t0))
+    return result
+
+sys.path.insert(0, {dashboard!r})
+os.chdir({dashboard!r})
+step('import dash', lambda: __import__('dash'))
+app = step('import app', lambda: __import__('app')).app
+client = app.server.test_client()
+step('GET /', lambda: client.get('/'))
+step('GET /_dash-layout', lambda: client.get('/_dash-layout'))
+step('GET /_dash-dependencies', lambda: client.get('/_dash-dependencies'))
+
+key = next(k for k in app.callback_map if '_pages_content' in k)
+callback = app.callback_map[key]
+outputs = [dict(zip(('id', 'property'), part.split('.', 1))) for part in key.strip('.').split('...')]
+
+def visit(path):
+    values = {{'pathname': path, 'search': '', 'hash': '', 'href': path}}
+    body = {{'output': key, 'outputs': outputs, 'changedPropIds': ['_pages_location.pathname'],
+            'inputs': [dict(i, value=values.get(i['property'])) for i in callback['inputs']],
+            'state': [dict(s, value=None) for s in callback['state']]}}
+    response = client.post('/_dash-update-component', json=body)
+    assert response.status_code == 200, response.status_code
+
+import dash
+for page in dash.page_registry.values():
+    step('first visit ' + page['path'], lambda: visit(page['path']))
+
+from core import startup
+# Spans datés depuis le lancement du processus
+origin = launched + startup.T0 - child_start
+print(json.dumps({{'steps': steps, 'spans': [(name, origin + start, seconds, thread) for name, (start, seconds, thread) in startup.spans.items()]}}))
+'''
+
+# 'import time: self [us] | cumulative | imported package', le nom indenté selon la profondeur
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def import_times(stderr):
+    packages = defaultdict(int)
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            packages[match.group(4).split('.')[0]] += int(match.group(1))
+    return {package: micros / 1e6 for package, micros in packages.items()}
+
+
+def profile(mode):
+    env = dict(os.environ, **MODES[mode], PROFILE_LAUNCHED=repr(time.time()))
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHILD.format(dashboard=DASHBOARD_DIR)],
+                         env=env, capture_output=True, text=True)
+    if out.returncode:
+        sys.exit(out.stderr[-3000:])
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result['imports'] = import_times(out.stderr)
+    return result
+
+
+def report(mode, result, top):
+    print(f'== {mode}')
+    elapsed = 0.0
+    for name, seconds in result['steps']:
+        elapsed += seconds
+        print(f'  {name:<32}{seconds * 1000:>9.1f} ms  (at {elapsed * 1000:>7.1f} ms)')
+    if result['spans']:
+        print('  startup spans:')
+        for name, start, seconds, thread in sorted(result['spans'], key=lambda span: span[1]):
+            print(f'    {name:<44}{seconds * 1000:>9.1f} ms  at {start * 1000:>7.1f} ms  [{thread}]')
+    print(f'  imports, self time by top-level package (total {sum(result["imports"].values()) * 1000:.0f} ms):')
+    for package, seconds in sorted(result['imports'].items(), key=lambda item: -item[1])[:top]:
+        print(f'    {package:<30}{seconds * 1000:>9.1f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', default='eager,fast')
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+    for mode in args.modes.split(','):
+        report(mode, profile(mode), args.top)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Hit the map callbacks from many threads and check every result matches a serial run.
+
+    python benchmarks/stress_callbacks.py [--threads 16] [--calls 200]
+
+The figure cache is bypassed (the undecorated callbacks are called) so every call
+really filters the store and builds the figures. Exits non-zero on any mismatch or if
+the shared store frames were modified.
+"""
+import argparse
+import inspect
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DASHBOARD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'dashboard')
+sys.path.insert(0, DASHBOARD_DIR)
+
+import dash
+import pandas as pd
+from plotly.io.json import to_json_plotly
+
+# Les pages appellent dash.register_page à l'import: il faut une app avec use_pages
+dash.Dash(__name__, use_pages=True, pages_folder=os.path.join(DASHBOARD_DIR, 'pages'))
+
+from core import store  # noqa: E402
+from pages import map as map_page  # noqa: E402
+
+
+def make_cases(count, seed=0):
+    rng = random.Random(seed)
+    first_year, last_year = store.year_bounds()
+    codes = store.starts()['storm_code'].tolist()
+    cases = []
+    for _ in range(count):
+        y0 = rng.randint(first_year, last_year)
+        value = [y0, rng.randint(y0, last_year)]
+        relayout = rng.choice([None, {'mapbox.center': {'lat': 25, 'lon': -80}, 'mapbox.zoom': 4}])
+        click = {'points': [{'customdata': [rng.choice(codes)]}]}
+        if rng.random() < 0.5:
+            region = rng.choice([None, {'bbox': [[-98, 31], [-81, 18]]}, {'lasso': [[-90, 10], [-60, 10], [-75, 35]]}])
+            cases.append(('update_output', (value, None, region, relayout, rng.choice([None, click]))))
+        else:
+            cases.append(('display_path_and_wind_graph_on_click', (click,)))
+    return cases
+
+
+def run(case):
+    name, args = case
+    callback = inspect.unwrap(getattr(map_page, name))
+    return to_json_plotly(callback(*args))
+
+
+def fingerprint():
+    return (pd.util.hash_pandas_object(store.tracks(), index=True).sum(),
+            pd.util.hash_pandas_object(store.starts(), index=True).sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--calls', type=int, default=200)
+    args = parser.parse_args()
+
+    before = fingerprint()
+    unique = make_cases(args.calls // 4)
+    expected = {i: run(case) for i, case in enumerate(unique)}
+    work = [random.Random(1).randrange(len(unique)) for _ in range(args.calls)]
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(lambda i: (i, run(unique[i])), work))
+    elapsed = time.perf_counter() - t0
+
+    mismatches = sum(result != expected[i] for i, result in results)
+    modified = fingerprint() != before
+    print(f'{len(results)} calls on {args.threads} threads in {elapsed:.2f}s, '
+          f'{mismatches} mismatches, store modified: {modified}')
+    sys.exit(1 if mismatches or modified else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+"""Benchmark suite of the dashboard hot paths, without browser or network.
+
+    python benchmarks/suite.py [--scales 1,10,100] [--repeat 20] [--output results.json]
+    python benchmarks/suite.py --compare before.json after.json
+
+For every scale, the bundled data/ (1) or a synthetic copy with that many times more
+storms is loaded in fresh interpreters: once with an empty Feather cache (cold) and
+once with the cache built (warm). The warm process then times the callbacks with the
+figure cache bypassed:
+- slider: map update for random year ranges
+- click: path and wind graph of random storms
+- density: heatmap for random year ranges
+- graphs: every figure of the graphs page, and the page layout sent on a visit
+For each one it records the first, median and p95 time, the JSON serialization time and the
+response size. Results are written as JSON (by default in benchmarks/results/, named
+after the current commit); --compare prints the ratio between two result files.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DASHBOARD_DIR = os.path.join(ROOT, 'dashboard')
+DATA_DIR = os.path.join(ROOT, 'data')
+WORK_DIR = os.path.join(ROOT, 'benchmarks', '.data')
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+# Processus de mesure: chargement du store, puis (si hot_paths) appels des callbacks
+CHILD = r'''
+import inspect, json, os, random, sys, time
+sys.path.insert(0, {dashboard!r})
+t0 = time.perf_counter()
+from core import store
+store.tracks(); store.temperatures()
+result = {{'load_s': time.perf_counter() - t0, 'rows': len(store.tracks()), 'storms': len(store.starts())}}
+if {hot_paths!r}:
+    import numpy as np
+    import dash
+    from plotly.io.json import to_json_plotly
+    dash.Dash('benchmarks', use_pages=True, pages_folder=os.path.join({dashboard!r}, 'pages'))
+    from pages import graphs as graphs_page, map as map_page
+
+    def measure(callback, cases):
+        timings, serialize, sizes = [], [], []
+        for args in cases:
+            t = time.perf_counter()
+            out = callback(*args)
+            timings.append(time.perf_counter() - t)
+            t = time.perf_counter()
+            payload = to_json_plotly(out)
+            serialize.append(time.perf_counter() - t)
+            sizes.append(len(payload))
+        return {{'first_ms': timings[0] * 1000, 'median_ms': float(np.median(timings) * 1000), 'p95_ms': float(np.percentile(timings, 95) * 1000),
+                 'serialize_ms': float(np.median(serialize) * 1000), 'bytes': int(np.median(sizes))}}
+
+    rng = random.Random(0)
+    first_year, last_year = store.year_bounds()
+    ranges = []
+    for _ in range({repeat!r}):
+        y0 = rng.randint(first_year, last_year)
+        ranges.append([y0, rng.randint(y0, last_year)])
+    codes = store.starts()['storm_code'].tolist()
+    clicks = [{{'points': [{{'customdata': [rng.choice(codes)]}}]}} for _ in range({repeat!r})]
+    unwrap = lambda module, name: inspect.unwrap(getattr(module, name))
+    result['slider'] = measure(unwrap(map_page, 'update_output'), [(r, None, None, None, None) for r in ranges])
+    result['click'] = measure(unwrap(map_page, 'display_path_and_wind_graph_on_click'), [(c,) for c in clicks])
+    result['density'] = measure(unwrap(map_page, 'update_density'), [(r,) for r in ranges])
+    for name, callback in inspect.getmembers(graphs_page, inspect.isfunction):
+        if name.startswith('update_'):
+            result['graphs.' + name] = measure(inspect.unwrap(callback), [(None,)] * min({repeat!r}, 5))
+    # Visite de la page: layout complet, figures comprises quand elles sont statiques
+    result['graphs.layout'] = measure(graphs_page.layout, [()] * min({repeat!r}, 5))
+print(json.dumps(result))
+'''
+
+
+def run_child(data_dir, cache_dir, hot_paths, repeat):
+    env = dict(os.environ, HURRICANE_DATA_DIR=data_dir, HURRICANE_CACHE='1', HURRICANE_CACHE_DIR=cache_dir)
+    code = CHILD.format(dashboard=DASHBOARD_DIR, hot_paths=hot_paths, repeat=repeat)
+    out = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True)
+    if out.returncode:
+        sys.exit(out.stderr)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+# Couples de lettres pour les copies synthétiques, hors des codes de bassin existants
+def _prefixes(count, reserved):
+    letters = (chr(65 + i // 26) + chr(65 + i % 26) for i in range(26 * 26))
+    return [prefix for prefix in letters if prefix not in reserved][:count]
+
+
+def synthetic_data(scale):
+    """Data folder with every storm copied `scale` times (kept in benchmarks/.data).
+
+    Copy k of a storm gets another two-letter prefix in its Key, so it is a distinct
+    storm, and its positions are shifted by a fraction of a degree.
+    """
+    import pandas as pd
+
+    if scale == 1:
+        return DATA_DIR
+    directory = os.path.join(WORK_DIR, f'x{scale}')
+    if os.path.exists(os.path.join(directory, 'done')):
+        return directory
+    os.makedirs(directory, exist_ok=True)
+    shutil.copy(os.path.join(DATA_DIR, 'GlobalTemperatures.csv'), directory)
+    basins = sorted(name[:2] for name in os.listdir(DATA_DIR) if len(name) == 6 and name.endswith('.csv'))
+    frames = {basin: pd.read_csv(os.path.join(DATA_DIR, f'{basin}.csv'), dtype=str, keep_default_na=False)
+              for basin in basins}
+    # Un fichier peut contenir plusieurs préfixes (EP.csv contient aussi des CP): chaque
+    # préfixe d'origine reçoit son propre préfixe dans chaque copie
+    originals = sorted({key[:2] for df in frames.values() for key in df['Key'].str.strip().unique()})
+    prefixes = iter(_prefixes(scale * len(originals), set(originals)))
+    renames = {k: {original: next(prefixes) for original in originals} for k in range(1, scale)}
+    for basin, df in frames.items():
+        lat = pd.to_numeric(df['Lat'])
+        lon = pd.to_numeric(df['Lon'])
+        keys = df['Key'].str.strip()
+        target = os.path.join(directory, f'{basin}.csv')
+        for k in range(scale):
+            copy = df if k == 0 else df.assign(
+                Key=keys.str[:2].map(renames[k]) + keys.str[2:],
+                Lat=(lat + (k % 7) * 0.1).round(1).astype(str),
+                Lon=(lon + (k % 11) * 0.1).round(1).astype(str))
+            copy.to_csv(target, mode='w' if k == 0 else 'a', header=k == 0, index=False)
+    open(os.path.join(directory, 'done'), 'w').close()
+    return directory
+
+
+def run_scale(scale, repeat):
+    data_dir = synthetic_data(scale)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cold = run_child(data_dir, cache_dir, False, repeat)
+        warm = run_child(data_dir, cache_dir, True, repeat)
+    result = {'rows': warm.pop('rows'), 'storms': warm.pop('storms'),
+              'load_cold_s': cold['load_s'], 'load_warm_s': warm.pop('load_s')}
+    result.update(warm)
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def _flatten(result):
+    for scale, metrics in result['scales'].items():
+        for name, value in metrics.items():
+            if isinstance(value, dict):
+                for field, number in value.items():
+                    yield f'x{scale} {name} {field}', number
+            else:
+                yield f'x{scale} {name}', value
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = dict(_flatten(json.load(f)))
+    with open(after_path) as f:
+        after = dict(_flatten(json.load(f)))
+    print(f"{'metric':<62}{'before':>12}{'after':>12}{'ratio':>8}")
+    for name in before:
+        if name in after:
+            ratio = after[name] / before[name] if before[name] else float('nan')
+            print(f'{name:<62}{before[name]:>12.4g}{after[name]:>12.4g}{ratio:>8.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', default='1,10,100')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'))
+    args = parser.parse_args()
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    commit = git_commit()
+    result = {'commit': commit, 'date': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+              'machine': platform.machine(), 'repeat': args.repeat, 'scales': {}}
+    for scale in (int(s) for s in args.scales.split(',')):
+        t0 = time.perf_counter()
+        result['scales'][str(scale)] = metrics = run_scale(scale, args.repeat)
+        print(f"x{scale}: {metrics['storms']} storms, {metrics['rows']} rows, "
+              f"load {metrics['load_cold_s']:.2f}s cold / {metrics['load_warm_s']:.2f}s warm, "
+              f"slider {metrics['slider']['median_ms']:.1f} ms, click {metrics['click']['median_ms']:.1f} ms, "
+              f"density {metrics['density']['median_ms']:.1f} ms ({time.perf_counter() - t0:.0f}s)")
+
+    output = args.output or os.path.join(RESULTS_DIR, f'{commit}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f'results written to {output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,11 @@
+import threading
+
 from dash import html, dcc
 from dash import Dash
 import dash
 
+from core import metrics, refresh, startup
+
 external_stylesheets = [
     'https://stackpath.bootstrapcdn.com/bootstrap/4.3.1/css/bootstrap.min.css',
     'https://fonts.googleapis.com/css2?family=Rubik:ital,wght@0,300..900;1,300..900&display=swap'
@@ -9,6 +13,24 @@ external_stylesheets = [
 
 app = Dash(__name__, use_pages=True, external_stylesheets=external_stylesheets)
 app.config.suppress_callback_exceptions = True
+# Application WSGI pour un serveur à plusieurs workers (voir gunicorn.conf.py)
+server = app.server
+# Temps et taille des réponses de chaque callback, exposés sur /metrics
+metrics.init_app(app.server)
+# Nouvelles données sans redémarrage: fichiers surveillés et POST /ingest (voir core.refresh)
+refresh.init_app(app.server)
+
+from pages import graphs, map as maps  # noqa: E402 (importés par Dash ci-dessus)
+
+
+# Données et figures initiales des pages, calculées en arrière-plan au démarrage
+def warm():
+    maps.warm()
+    graphs.warm()
+
+
+if not startup.FAST:
+    threading.Thread(target=warm, daemon=True).start()
 
 navbar = html.Nav(
     className='navbar navbar-expand-lg navbar-light bg-light',
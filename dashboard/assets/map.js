@@ -0,0 +1,58 @@
+// Interactions purement visuelles de la carte, traitées dans le navigateur
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    map: {
+        // Mémorise la vue courante. Le serveur n'est prévenu (map-viewport) que si la carte
+        // est en niveau de détail, c'est-à-dire si les points envoyés dépendent de la vue.
+        viewport: function(relayoutData, figure) {
+            const noUpdate = window.dash_clientside.no_update;
+            if (!relayoutData || !relayoutData['mapbox.center']) {
+                return [noUpdate, noUpdate];
+            }
+            const view = {
+                'mapbox.center': relayoutData['mapbox.center'],
+                'mapbox.zoom': relayoutData['mapbox.zoom'],
+                'mapbox._derived': relayoutData['mapbox._derived']
+            };
+            const meta = (figure && figure.layout && figure.layout.meta) || {};
+            return [view, meta.lod ? view : noUpdate];
+        },
+
+        // Géométrie de la zone sélectionnée, sans la liste des points sélectionnés: le
+        // serveur filtre sur les trajectoires qui la traversent. null quand la sélection
+        // est retirée (double-clic).
+        region: function(selectedData) {
+            if (!selectedData) {
+                return null;
+            }
+            if (selectedData.range && selectedData.range.mapbox) {
+                return {bbox: selectedData.range.mapbox};
+            }
+            if (selectedData.lassoPoints && selectedData.lassoPoints.mapbox) {
+                return {lasso: selectedData.lassoPoints.mapbox};
+            }
+            return null;
+        },
+
+        // Retire le chemin affiché et recentre la carte, sans aller-retour serveur
+        clear: function(n_clicks, figure) {
+            const noUpdate = window.dash_clientside.no_update;
+            if (!n_clicks || !figure) {
+                return [noUpdate, noUpdate, noUpdate];
+            }
+            const meta = figure.layout.meta || {};
+            const center = {lat: 20, lon: -60};
+            const layout = Object.assign({}, figure.layout, {
+                title: {text: 'Hurricane Path'},
+                mapbox: Object.assign({}, figure.layout.mapbox, {center: center, zoom: 3}),
+                uirevision: 'clear-' + n_clicks
+            });
+            // Les traces du chemin sont vidées mais gardent leur place (voir pages/map.py)
+            const base = meta.base_traces === undefined ? 1 : meta.base_traces;
+            const data = figure.data.map(function(trace, i) {
+                return i < base ? trace : Object.assign({}, trace, {lon: [], lat: []});
+            });
+            return [null, Object.assign({}, figure, {data: data, layout: layout}),
+                    {'mapbox.center': center, 'mapbox.zoom': 3}];
+        }
+    }
+});
@@ -0,0 +1,102 @@
+import pandas as pd
+
+from core import startup, store
+
+ROLLING_WINDOW = 10
+ALL_BASINS = 'ALL'
+
+
+def _rolling(df, columns):
+    # Moyenne glissante sur 10 ans, calculée séparément pour chaque bassin
+    return df.groupby(level='basin', observed=True)[columns].transform(
+        lambda s: s.rolling(window=ROLLING_WINDOW).mean())
+
+
+# Taille, min, max, somme et nombre de vents de chaque (bassin, année) de `tracks`
+def _group(tracks):
+    per_basin = tracks.groupby(['basin', 'year'], observed=True)['Wind_kmh'].agg(['size', 'min', 'max', 'sum', 'count'])
+    per_basin.index = per_basin.index.set_levels(per_basin.index.levels[0].astype(str), level='basin')
+    return per_basin
+
+
+def _finish(per_basin):
+    # Les totaux tous bassins confondus se déduisent des agrégats par bassin
+    totals = per_basin.groupby(level='year').agg({'size': 'sum', 'min': 'min', 'max': 'max', 'sum': 'sum', 'count': 'sum'})
+    totals = pd.concat({ALL_BASINS: totals}, names=['basin'])
+
+    yearly = pd.concat([per_basin, totals]).sort_index()
+    yearly = pd.DataFrame({
+        'count': yearly['size'],
+        'min_wind': yearly['min'],
+        'max_wind': yearly['max'],
+        'mean_wind': yearly['sum'] / yearly['count'],
+    })
+    rolling = _rolling(yearly, ['count', 'min_wind', 'max_wind', 'mean_wind']).add_suffix('_rolling')
+    return pd.concat([yearly, rolling], axis=1)
+
+
+# Bassin par bassin tant que les données ne sont pas indexées: le premier calcul ne
+# construit pas l'index des ouragans (voir store.basin_tracks)
+@startup.timed
+def _build_yearly():
+    basins = store.available_basins()
+    if store.indexed() or not basins:
+        per_basin = _group(store.tracks())
+    else:
+        per_basin = pd.concat([_group(store.basin_tracks(basin)) for basin in basins]).sort_index()
+    return per_basin, _finish(per_basin)
+
+
+# Après un refresh, seuls les (bassin, année) des ouragans modifiés sont regroupés à nouveau
+@startup.timed
+def _update_yearly(previous, changes):
+    if not changes['pairs']:
+        return previous
+    per_basin, _ = previous
+    pairs = list(changes['pairs'])
+    tracks = store.tracks()
+    fresh = _group(tracks[tracks['year'].isin({year for _, year in pairs})])
+    per_basin = pd.concat([per_basin[~per_basin.index.isin(pairs)], fresh[fresh.index.isin(pairs)]]).sort_index()
+    return per_basin, _finish(per_basin)
+
+
+@startup.timed
+def _build_temperature():
+    temperatures = store.temperatures()
+    yearly = temperatures.groupby('year')['LandAverageTemperature'].mean().rename('mean_temp').to_frame()
+    yearly['mean_temp_rolling'] = yearly['mean_temp'].rolling(window=ROLLING_WINDOW).mean()
+    return yearly
+
+
+def _update_temperature(previous, changes):
+    return _build_temperature() if changes['temperatures'] else previous
+
+
+# Agrégats par bassin et par année, et températures par année, pour chaque version du store
+_yearly = store.Derived(_build_yearly, _update_yearly)
+_temperature = store.Derived(_build_temperature, _update_temperature)
+
+
+# Per-year aggregates of one basin ('AL', 'EP', or 'ALL' for every basin):
+# year, count (track records), min/max/mean wind in km/h and their 10-year rolling means.
+def yearly(basin=ALL_BASINS):
+    return _yearly.get()[1].loc[basin].reset_index()
+
+
+def basins():
+    return [basin for basin in _yearly.get()[1].index.unique(level='basin') if basin != ALL_BASINS]
+
+
+# The same aggregates for every basin in one frame, with a 'basin' column (no 'ALL' rows).
+def yearly_by_basin():
+    return _yearly.get()[1].drop(index=ALL_BASINS, level='basin').reset_index()
+
+
+# Mean land temperature per year and its 10-year rolling mean.
+def temperature_by_year():
+    return _temperature.get().reset_index()
+
+
+# Mean temperature and number of track records of a basin for every year present in both datasets.
+def temperature_vs_count(basin=ALL_BASINS):
+    return _temperature.get()[['mean_temp']].join(_yearly.get()[1].loc[basin, ['count']], how='inner').reset_index()
@@ -0,0 +1,21 @@
+import os
+import re
+
+# Basin files are found in the data folder: data/<BASIN>.csv, BASIN being a two-letter
+# code (AL, EP, WP, NI, SI, SP...). HURRICANE_BASINS=AL,EP restricts the ones loaded.
+_BASIN_FILE = re.compile(r'^([A-Z]{2})\.csv$')
+SELECTED = tuple(b.strip() for b in os.environ.get('HURRICANE_BASINS', '').split(',') if b.strip())
+
+
+def path(data_dir, basin):
+    return os.path.join(data_dir, f'{basin}.csv')
+
+
+# Codes of the basins found in data_dir, sorted.
+def available(data_dir):
+    try:
+        names = os.listdir(data_dir)
+    except OSError:
+        return ()
+    found = sorted(match.group(1) for match in map(_BASIN_FILE.match, names) if match)
+    return tuple(basin for basin in found if not SELECTED or basin in SELECTED)
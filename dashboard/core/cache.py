@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow is optional: without it every start parses the CSVs
+    feather = None
+
+# Bump when the typed layout written by the store changes.
+CACHE_VERSION = 2
+CACHE_DIR = os.environ.get('HURRICANE_CACHE_DIR')
+ENABLED = os.environ.get('HURRICANE_CACHE', '1') != '0'
+# Fin de fichier dont l'empreinte est gardée par file_state
+TAIL_BYTES = 4096
+
+
+def cache_dir(source_path):
+    return CACHE_DIR or os.path.join(os.path.dirname(os.path.abspath(source_path)), '.cache')
+
+
+def file_hash(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def file_state(path, size=None):
+    """Size, mtime and digest of the last TAIL_BYTES of `path` (of its first `size` bytes
+    if given): enough to tell later whether rows were only appended to it."""
+    stat = os.stat(path)
+    size = stat.st_size if size is None else size
+    with open(path, 'rb') as f:
+        f.seek(max(size - TAIL_BYTES, 0))
+        tail = f.read(size - max(size - TAIL_BYTES, 0))
+    return {'size': size, 'mtime_ns': stat.st_mtime_ns, 'tail': digest(tail)}
+
+
+def _paths(source_path, name):
+    directory = cache_dir(source_path)
+    return os.path.join(directory, f'{name}.feather'), os.path.join(directory, f'{name}.json')
+
+
+def read_json(meta_path):
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json(path, payload):
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)
+
+
+def is_fresh(source_path, name):
+    """Return True when the cache for `name` still matches `source_path`.
+
+    A matching mtime and size is trusted as is; otherwise the content hash decides, so a
+    touched but unchanged file (git checkout, copy) keeps its cache.
+    """
+    frame_path, meta_path = _paths(source_path, name)
+    meta = read_json(meta_path)
+    if meta is None or meta.get('version') != CACHE_VERSION or not os.path.exists(frame_path):
+        return False
+    stat = os.stat(source_path)
+    if meta['mtime_ns'] == stat.st_mtime_ns and meta['size'] == stat.st_size:
+        return True
+    if meta['hash'] != file_hash(source_path):
+        return False
+    meta.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+    write_json(meta_path, meta)
+    return True
+
+
+def read_frame(frame_path):
+    # The file is mapped instead of read into a buffer, but to_pandas() still copies the
+    # columns (blocks of same dtype are merged, nulls become NaN) and the store then
+    # concatenates the basins: the cache saves the CSV parsing, not memory.
+    return feather.read_table(frame_path, memory_map=True).to_pandas()
+
+
+def write_frame(frame_path, df):
+    os.makedirs(os.path.dirname(frame_path), exist_ok=True)
+    tmp = f'{frame_path}.tmp'
+    feather.write_feather(df.reset_index(drop=True), tmp, compression='uncompressed')
+    os.replace(tmp, frame_path)
+
+
+def read(source_path, name):
+    frame_path, _ = _paths(source_path, name)
+    return read_frame(frame_path)
+
+
+def write(source_path, name, df):
+    frame_path, meta_path = _paths(source_path, name)
+    stat = os.stat(source_path)
+    write_frame(frame_path, df)
+    write_json(meta_path, {
+        'version': CACHE_VERSION,
+        'source': os.path.abspath(source_path),
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'hash': file_hash(source_path),
+    })
+
+
+def cached_frame(source_path, name, build):
+    """Load `name` from the columnar cache, or call `build(source_path)` and cache the result."""
+    if feather is None or not ENABLED:
+        return build(source_path)
+    try:
+        if is_fresh(source_path, name):
+            return read(source_path, name)
+    except (OSError, ValueError):
+        pass
+    df = build(source_path)
+    try:
+        write(source_path, name, df)
+    except OSError:
+        pass  # read-only data directory: keep serving from the CSV
+    return df
@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+
+from core import startup, store
+
+# Taille des cellules de la grille de densité, en degrés
+BIN_DEGREES = float(os.environ.get('HURRICANE_DENSITY_BIN', 0.5))
+
+_n_lon = int(round(360 / BIN_DEGREES))
+
+
+def _cell_ids(lat, lon):
+    lat = np.asarray(lat, dtype='float64')
+    lon = (np.asarray(lon, dtype='float64') + 180) % 360 - 180
+    return np.floor((lat + 90) / BIN_DEGREES).astype(np.int64) * _n_lon + np.floor((lon + 180) / BIN_DEGREES).astype(np.int64)
+
+
+# Grille cumulée: (first_year, cell_lat, cell_lon, cumulative, cells). cumulative[i] =
+# points par cellule occupée (ids `cells`) pour les ouragans nés avant first_year + i.
+@startup.timed
+def _build():
+    tracks = store.tracks()
+    storm_years, offsets = store.storm_index()
+    first_year = int(storm_years[0])
+    cells, cell_of_row = np.unique(_cell_ids(tracks['Lat'], tracks['Lon']), return_inverse=True)
+
+    # Année de genèse de chaque point, comme pour la carte des points de départ
+    row_year = np.repeat(storm_years.astype(np.int64), np.diff(offsets)) - first_year
+    n_years = int(storm_years[-1]) - first_year + 1
+    counts = np.bincount(row_year * len(cells) + cell_of_row, minlength=n_years * len(cells))
+    cumulative = np.zeros((n_years + 1, len(cells)), dtype=np.int32)
+    np.cumsum(counts.reshape(n_years, len(cells)), axis=0, out=cumulative[1:])
+
+    cell_lat = ((cells // _n_lon) + 0.5) * BIN_DEGREES - 90
+    cell_lon = ((cells % _n_lon) + 0.5) * BIN_DEGREES - 180
+    return first_year, cell_lat.astype(np.float32), cell_lon.astype(np.float32), cumulative, cells
+
+
+# Après un refresh, seules les lignes des années de genèse touchées sont recomptées; une
+# nouvelle cellule ou une nouvelle année hors de la grille la fait reconstruire
+@startup.timed
+def _update(previous, changes):
+    first_year, cell_lat, cell_lon, cumulative, cells = previous
+    if not changes['years']:
+        return previous
+    storm_years, offsets = store.storm_index()
+    if int(storm_years[0]) != first_year or int(storm_years[-1]) != first_year + len(cumulative) - 2:
+        return _build()
+    tracks = store.tracks()
+    counts = np.diff(cumulative, axis=0)
+    for year in changes['years']:
+        first, stop = store.storm_range(year, year)
+        points = tracks.iloc[offsets[first]:offsets[stop]]
+        ids = _cell_ids(points['Lat'], points['Lon'])
+        index = np.minimum(np.searchsorted(cells, ids), len(cells) - 1)
+        if not np.array_equal(cells[index], ids):
+            return _build()
+        counts[year - first_year] = np.bincount(index, minlength=len(cells))
+    cumulative = np.zeros_like(cumulative)
+    np.cumsum(counts, axis=0, out=cumulative[1:])
+    return first_year, cell_lat, cell_lon, cumulative, cells
+
+
+# Publiée avec le snapshot: les workers d'un serveur mappent la grille (voir store.publish)
+_grid = store.Derived(_build, _update, name='density')
+
+
+# Number of track points per grid cell for the storms that started in [first_year, last_year].
+# Returns the centre lat/lon and count of every non-empty cell; the counts are the
+# difference of two cumulative grids, so the cost depends on the grid, not on the data.
+def counts_between(first_year, last_year):
+    grid_first_year, cell_lat, cell_lon, cumulative, _ = _grid.get()
+    n_years = len(cumulative) - 1
+    start = min(max(first_year - grid_first_year, 0), n_years)
+    stop = min(max(last_year - grid_first_year + 1, start), n_years)
+    counts = cumulative[stop] - cumulative[start]
+    cells = np.flatnonzero(counts)
+    return cell_lat[cells], cell_lon[cells], counts[cells]
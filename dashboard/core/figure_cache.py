@@ -0,0 +1,105 @@
+import functools
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import dash
+from plotly.io.json import to_json_plotly
+
+from core import startup
+
+# Pas de pandas au démarrage en mode rapide: le store n'est importé qu'au premier callback
+store = startup.module('core.store')
+
+
+class FigureCache:
+    """LRU cache of serialized callback results, bounded by entry count and by bytes."""
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key, payload):
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = payload
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+figures = FigureCache(
+    max_entries=int(os.environ.get('HURRICANE_FIGURE_CACHE_ENTRIES', 256)),
+    max_bytes=int(os.environ.get('HURRICANE_FIGURE_CACHE_BYTES', 64 * 1024 * 1024)),
+)
+
+
+def _contains_no_update(result):
+    if isinstance(result, (list, tuple)):
+        return any(isinstance(value, type(dash.no_update)) for value in result)
+    return isinstance(result, type(dash.no_update))
+
+
+def memoize(key=None, cache=figures):
+    """Cache the JSON of a callback's result under (version of the data, callback name, inputs).
+
+    `key` maps the callback arguments to the part of them the result depends on (for
+    example the map centre and zoom out of a full relayoutData). On a hit the callback
+    returns the stored JSON parsed back into plain lists and dicts, so neither pandas
+    nor plotly's figure validation and encoder run again. Results containing
+    dash.no_update are never cached. After a refresh of the data the keys change, and
+    the figures of the previous version are evicted as the cache fills up.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args):
+            inputs = key(*args) if key is not None else args
+            cache_key = (store.generation(), func.__module__, func.__name__, json.dumps(inputs, sort_keys=True, default=str))
+            payload = cache.get(cache_key)
+            if payload is not None:
+                return json.loads(payload)
+            result = func(*args)
+            if not _contains_no_update(result):
+                cache.put(cache_key, to_json_plotly(result))
+            return result
+        return wrapper
+    return decorator
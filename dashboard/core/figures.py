@@ -0,0 +1,56 @@
+import numpy as np
+import plotly.graph_objects as go
+
+
+def _runs(mask):
+    """Return (first, last) index pairs of the runs of True in a boolean array."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1
+
+
+def _polyline(values, firsts, lasts):
+    """Concatenate values[first:last + 2] for every run, with a NaN gap between runs."""
+    lengths = lasts - firsts + 2
+    # Position of every output point inside its run, then its index in `values`
+    run_of_point = np.repeat(np.arange(len(firsts)), lengths + 1)
+    offset = np.arange(len(run_of_point)) - np.repeat(np.cumsum(lengths + 1) - lengths - 1, lengths + 1)
+    index = firsts[run_of_point] + offset
+    gap = offset == lengths[run_of_point]
+    out = values[np.minimum(index, len(values) - 1)]
+    out[gap] = np.nan
+    return out[:-1]
+
+
+# Path of one storm as at most two Scattermapbox traces: segment i -> i + 1 is red when
+# point i has HU status, blue otherwise. Runs of the same colour are drawn as one line,
+# separated by gaps, instead of one trace per segment.
+def path_traces(details, hu_color='red', other_color='blue', width=4):
+    lon = details['Lon'].to_numpy()
+    lat = details['Lat'].to_numpy()
+    is_hu = (details['Status'] == 'HU').to_numpy()[:-1]
+    name = str(details['Name'].iloc[0]) if len(details) else ''
+    traces = []
+    for mask, color in ((is_hu, hu_color), (~is_hu, other_color)):
+        firsts, lasts = _runs(mask)
+        if not len(firsts):
+            continue
+        traces.append(go.Scattermapbox(
+            mode='lines',
+            lon=_polyline(lon, firsts, lasts),
+            lat=_polyline(lat, firsts, lasts),
+            line=dict(width=width, color=color),
+            hoverinfo='text',
+            text=name,
+            showlegend=False
+        ))
+    return traces
+
+
+# Merged time intervals during which the storm had HU status. A record at HU covers
+# [t_i, t_i+1] (the last record covers a single instant), so consecutive HU records
+# collapse into one interval.
+def hurricane_intervals(details):
+    times = details['DateTime'].array
+    firsts, lasts = _runs((details['Status'] == 'HU').to_numpy())
+    ends = np.minimum(lasts + 1, len(times) - 1)
+    return list(zip(times[firsts], times[ends]))
@@ -0,0 +1,106 @@
+import logging
+import os
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+try:
+    import psutil
+except ImportError:  # psutil is optional: without it peak memory is not tracked
+    psutil = None
+
+# Rows parsed per chunk at the start of a file. The size is halved while the memory used
+# by the ingestion goes over its budget, down to MIN_CHUNK_ROWS.
+CHUNK_ROWS = int(os.environ.get('HURRICANE_INGEST_CHUNK_ROWS', 20000))
+MIN_CHUNK_ROWS = 1000
+# Budget of the ingestion: peak RSS growth at most MAX_RSS_RATIO times the size of the
+# typed frame it produces, plus RSS_ALLOWANCE bytes for the parser buffers, whatever the
+# file size (0 makes the budget a pure fraction of the frame).
+MAX_RSS_RATIO = float(os.environ.get('HURRICANE_INGEST_MAX_RSS_RATIO', 4))
+RSS_ALLOWANCE = int(float(os.environ.get('HURRICANE_INGEST_RSS_ALLOWANCE_MB', 16)) * 2**20)
+
+logger = logging.getLogger(__name__)
+
+# Report of the last ingestion of each file, by absolute path
+reports = {}
+
+
+def _rss():
+    return psutil.Process().memory_info().rss if psutil is not None else None
+
+
+def _budget(frame_bytes):
+    return int(MAX_RSS_RATIO * frame_bytes) + RSS_ALLOWANCE
+
+
+# Concatenate frames with the same columns. Each frame has its own categories, which
+# pd.concat would turn back into object columns: categorical columns are merged instead.
+def concat(frames):
+    columns = {}
+    for name in frames[0].columns:
+        parts = [frame[name] for frame in frames]
+        if isinstance(parts[0].dtype, pd.CategoricalDtype):
+            columns[name] = union_categoricals(parts, sort_categories=True)
+        else:
+            columns[name] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns)
+
+
+def read_csv(path, usecols, dtype, prepare, chunk_rows=None):
+    """Stream `path` chunk by chunk and return the concatenation of `prepare(chunk)`.
+
+    `prepare` filters and downcasts a raw chunk; its remaining string columns are turned
+    into categories, so only one raw chunk is held in memory at a time. A report (rows,
+    chunks, frame size, peak RSS growth) is kept in `reports[path]`.
+    """
+    path = os.path.abspath(path)
+    chunk_rows = chunk_rows or CHUNK_ROWS
+    size = os.path.getsize(path)
+    baseline = _rss()
+    peak = 0
+    chunks = []
+    kept_bytes = 0
+    rows_read = 0
+    chunk_count = 0
+    with open(path, 'rb') as f, pd.read_csv(f, usecols=usecols, dtype=dtype, chunksize=chunk_rows) as reader:
+        while True:
+            try:
+                raw = reader.get_chunk(chunk_rows)
+            except StopIteration:
+                break
+            rows_read += len(raw)
+            chunk_count += 1
+            chunk = prepare(raw).reset_index(drop=True)
+            for column in chunk.columns[chunk.dtypes == object]:
+                chunk[column] = chunk[column].astype('category')
+            if len(chunk) or not chunks:
+                chunks.append(chunk)
+                kept_bytes += int(chunk.memory_usage(deep=True).sum())
+            if baseline is None:
+                continue
+            # Mesure avec le chunk brut encore en mémoire: c'est le moment le plus chargé
+            peak = max(peak, _rss() - baseline)
+            progress = min(f.tell() / size, 1.0) if size else 1.0
+            # Taille finale estimée d'après la part du fichier déjà lue
+            if peak > _budget(kept_bytes / max(progress, 1e-3)) and chunk_rows > MIN_CHUNK_ROWS:
+                chunk_rows = max(MIN_CHUNK_ROWS, chunk_rows // 2)
+            del raw, chunk
+
+    df = concat(chunks)
+    frame_bytes = int(df.memory_usage(deep=True).sum())
+    # Les chunks ne descendent pas sous MIN_CHUNK_ROWS: le budget peut rester dépassé
+    over_budget = baseline is not None and peak > _budget(frame_bytes)
+    if over_budget:
+        logger.warning('ingestion of %s went over its memory budget: peak RSS +%.1f MB for %.1f MB allowed',
+                       path, peak / 2**20, _budget(frame_bytes) / 2**20)
+    reports[path] = {
+        'rows_read': rows_read,
+        'rows_kept': len(df),
+        'chunks': chunk_count,
+        'chunk_rows': chunk_rows,
+        'frame_bytes': frame_bytes,
+        'peak_rss_bytes': peak if baseline is not None else None,
+        'max_rss_bytes': _budget(frame_bytes),
+        'over_budget': over_budget,
+    }
+    return df
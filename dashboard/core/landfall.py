@@ -0,0 +1,183 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from core import cache, startup, store
+
+try:
+    import geopandas
+    import shapely
+except ImportError:  # geopandas/shapely are optional: without them no landfall is detected
+    geopandas = shapely = None
+
+# Bump when the detection below changes: persisted results are then recomputed.
+LANDFALL_VERSION = 2
+WORLD_PATH = os.path.join(store.DATA_DIR, 'world.shp')
+
+EVENT_COLUMNS = {
+    'storm_code': 'int64', 'row': 'int32', 'land': 'int32', 'time': 'datetime64[ns]',
+    'lat': 'float32', 'lon': 'float32', 'wind_kmh': 'float32',
+}
+
+_land = None
+
+
+def _empty_events():
+    return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in EVENT_COLUMNS.items()})
+
+
+# Polygones des terres, leurs contours et un STRtree sur les polygones
+def _load_land():
+    global _land
+    if _land is None:
+        polygons = shapely.get_parts(geopandas.read_file(WORLD_PATH).geometry.to_numpy())
+        shapely.prepare(polygons)
+        _land = polygons, shapely.boundary(polygons), shapely.STRtree(polygons)
+    return _land
+
+
+# Rows i of the segments i -> i + 1 of the storms at `positions` in the store's index.
+def _segment_rows(offsets, positions):
+    firsts = offsets[positions]
+    counts = offsets[positions + 1] - firsts - 1
+    within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(firsts, counts) + within, np.repeat(positions, counts)
+
+
+def detect(tracks, offsets, positions):
+    """Landfalls of the storms at `positions` (indexes in the store's storm index).
+
+    A landfall is the first crossing of a land boundary by a segment that starts at sea;
+    a storm that goes back to sea and reaches land again has several landfalls. Every
+    segment is tested at once against the STRtree; nothing loops over storms.
+    """
+    if shapely is None or not len(positions):
+        return _empty_events()
+    polygons, boundaries, tree = _load_land()
+    rows, storm_positions = _segment_rows(offsets, np.asarray(positions, dtype='int64'))
+    lon = tracks['Lon'].to_numpy(dtype='float64')
+    lat = tracks['Lat'].to_numpy(dtype='float64')
+    lon0, lat0, lon1, lat1 = lon[rows], lat[rows], lon[rows + 1], lat[rows + 1]
+
+    # Départ en mer, sans traverser l'antiméridien (le segment ferait le tour du globe)
+    on_land = np.zeros(len(rows), dtype=bool)
+    on_land[tree.query(shapely.points(lon0, lat0), predicate='intersects')[0]] = True
+    keep = ~on_land & (np.abs(lon1 - lon0) <= 180)
+    rows, storm_positions = rows[keep], storm_positions[keep]
+    coords = np.stack([np.column_stack([lon0[keep], lat0[keep]]),
+                       np.column_stack([lon1[keep], lat1[keep]])], axis=1)
+    lines = shapely.linestrings(coords)
+
+    # Points où chaque segment coupe un contour, puis le plus proche du départ du segment
+    segment, land = tree.query(lines, predicate='intersects')
+    crossings = shapely.intersection(lines[segment], boundaries[land])
+    points, which = shapely.get_coordinates(crossings, return_index=True)
+    segment, land = segment[which], land[which]
+    fraction = np.nan_to_num(shapely.line_locate_point(lines[segment], shapely.points(points), normalized=True))
+    order = np.lexsort((fraction, segment))
+    order = order[np.r_[True, segment[order][1:] != segment[order][:-1]]] if len(order) else order
+    segment, land, fraction, points = segment[order], land[order], fraction[order], points[order]
+
+    row = rows[segment]
+    times = tracks['DateTime'].to_numpy()
+    wind = tracks['Wind_kmh'].to_numpy(dtype='float64')
+    step = (times[row + 1] - times[row]) * fraction
+    return pd.DataFrame({
+        'storm_code': store.starts()['storm_code'].to_numpy()[storm_positions[segment]],
+        'row': (row - offsets[storm_positions[segment]]).astype('int32'),
+        'land': land.astype('int32'),
+        'time': times[row] + step.astype('timedelta64[ns]'),
+        'lat': points[:, 1].astype('float32'),
+        'lon': points[:, 0].astype('float32'),
+        'wind_kmh': (wind[row] + (wind[row + 1] - wind[row]) * fraction).astype('float32'),
+    })
+
+
+# Empreinte de chaque ouragan aux positions données: si l'un de ses points change (ou
+# s'ajoute), ses landfalls sont recalculés
+def _fingerprints(positions):
+    return pd.DataFrame({
+        'storm_code': store.starts()['storm_code'].to_numpy()[positions],
+        'hash': store.storm_hashes(positions),
+    })
+
+
+def _paths():
+    directory = cache.cache_dir(WORLD_PATH)
+    return (os.path.join(directory, 'landfalls.feather'), os.path.join(directory, 'landfall_storms.feather'),
+            os.path.join(directory, 'landfalls.json'))
+
+
+def _load_persisted():
+    events_path, storms_path, meta_path = _paths()
+    meta = cache.read_json(meta_path)
+    if (cache.feather is None or meta is None or meta.get('version') != LANDFALL_VERSION
+            or meta.get('world') != cache.file_hash(WORLD_PATH)):
+        return _empty_events(), _fingerprints(np.empty(0, dtype='int64'))
+    return cache.read_frame(events_path), cache.read_frame(storms_path)
+
+
+def _persist(events, fingerprints):
+    events_path, storms_path, meta_path = _paths()
+    cache.write_frame(events_path, events)
+    cache.write_frame(storms_path, fingerprints)
+    cache.write_json(meta_path, {'version': LANDFALL_VERSION, 'world': cache.file_hash(WORLD_PATH)})
+
+
+# Détection des ouragans nouveaux ou modifiés depuis `previous` (événements et empreintes
+# déjà traités), par défaut les résultats persistés. Après un refresh, `changed` (codes des
+# ouragans ajoutés, modifiés ou retirés, voir store.Version) dit lesquels le sont: seuls
+# ceux-là sont re-détectés et re-hachés. Renvoie (événements, empreintes).
+@startup.timed
+def _update(previous=None, changed=None):
+    tracks = store.tracks()
+    _, offsets = store.storm_index()
+    codes = store.starts()['storm_code'].to_numpy()
+    try:
+        events, processed = previous if previous is not None else _load_persisted()
+    except (OSError, ValueError):
+        events, processed = _empty_events(), _fingerprints(np.empty(0, dtype='int64'))
+    if changed is None:
+        current = _fingerprints(np.arange(len(codes)))
+        # Ouragans nouveaux ou modifiés depuis la dernière détection
+        known = current.merge(processed, how='left', on=['storm_code', 'hash'], indicator=True)
+        todo = np.flatnonzero((known['_merge'] == 'left_only').to_numpy())
+    else:
+        todo = np.flatnonzero(np.isin(codes, changed))
+        current = pd.concat([processed[~processed['storm_code'].isin(changed)], _fingerprints(todo)],
+                            ignore_index=True)
+    stale = ~events['storm_code'].isin(codes) | events['storm_code'].isin(codes[todo])
+    if not len(todo) and not stale.any():
+        return events, current
+    events = pd.concat([events[~stale], detect(tracks, offsets, todo)], ignore_index=True)
+    events = events.sort_values(['storm_code', 'row'], kind='stable', ignore_index=True)
+    if cache.feather is not None and cache.ENABLED:
+        try:
+            _persist(events, current)
+        except OSError:
+            pass  # read-only data directory: detect again at the next start
+    return events, current
+
+
+# True when landfalls can be detected (shapely, geopandas and data/world.shp are there).
+def available():
+    return shapely is not None and os.path.exists(WORLD_PATH)
+
+
+def _build():
+    return _update() if available() else (_empty_events(), None)
+
+
+# Après un refresh, on repart des résultats de la version précédente
+def _refresh(previous, changes):
+    return _update(previous, changes['storms']) if previous[1] is not None else previous
+
+
+_events = store.Derived(_build, _refresh)
+
+
+# Every landfall: storm_code, row of the segment in the storm's track, index of the land
+# polygon, interpolated time, position and wind (km/h) at the coast crossing.
+def landfalls():
+    return _events.get()[0].copy(deep=False)
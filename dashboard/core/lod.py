@@ -0,0 +1,146 @@
+import math
+import os
+
+import numpy as np
+
+from core import store
+
+# Au-delà de ce nombre de points de départ, la carte passe en niveau de détail
+MAX_POINTS = int(os.environ.get('HURRICANE_MAP_MAX_POINTS', 5000))
+# Taille d'un cluster à l'écran, en pixels
+CLUSTER_PIXELS = 40
+# Pas, en pixels, auquel les bornes de la vue sont arrondies vers l'extérieur (voir viewport)
+SNAP_PIXELS = 32
+# Taille supposée de la carte quand le navigateur n'a pas encore envoyé l'emprise
+MAP_WIDTH, MAP_HEIGHT = 1200, 700
+INDEX_DEGREES = 2.0
+
+_n_lon = int(360 / INDEX_DEGREES)
+
+
+def _lon180(lon):
+    return (np.asarray(lon, dtype='float64') + 180) % 360 - 180
+
+
+def _cell_ids(lat, lon):
+    lat_bin = np.clip(np.floor((np.asarray(lat, dtype='float64') + 90) / INDEX_DEGREES), 0, 180 / INDEX_DEGREES - 1)
+    lon_bin = np.floor((_lon180(lon) + 180) / INDEX_DEGREES)
+    return lat_bin.astype(np.int64) * _n_lon + lon_bin.astype(np.int64)
+
+
+# Index en grille des points de départ: cellules triées et positions des ouragans dans cet ordre
+def _build_index():
+    starts = store.starts()
+    cells = _cell_ids(starts['Lat'], starts['Lon'])
+    order = np.argsort(cells, kind='stable')
+    return cells[order], order
+
+
+_index = store.Derived(_build_index)
+
+
+def viewport(relayoutData):
+    """Return (south, west, north, east, zoom) of the map from its relayoutData.
+
+    Uses the corner coordinates plotly reports after an interaction; before that, the
+    bounds are estimated from the centre and zoom for a MAP_WIDTH x MAP_HEIGHT map. The
+    bounds are widened to a multiple of SNAP_PIXELS at that zoom, so views that differ
+    by a few pixels (window sizes, small pans) select the same points and can share a
+    cached figure.
+    """
+    relayoutData = relayoutData or {}
+    center = relayoutData.get('mapbox.center', {'lat': 20, 'lon': -60})
+    zoom = relayoutData.get('mapbox.zoom', 3)
+    degrees_per_pixel = 360 / (256 * 2 ** zoom)
+    corners = relayoutData.get('mapbox._derived', {}).get('coordinates')
+    if corners:
+        lons = [corner[0] for corner in corners]
+        lats = [corner[1] for corner in corners]
+        south, west, north, east = min(lats), min(lons), max(lats), max(lons)
+    else:
+        half_width = MAP_WIDTH / 2 * degrees_per_pixel
+        half_height = MAP_HEIGHT / 2 * degrees_per_pixel * math.cos(math.radians(center['lat']))
+        south, west = center['lat'] - half_height, center['lon'] - half_width
+        north, east = center['lat'] + half_height, center['lon'] + half_width
+    step = SNAP_PIXELS * degrees_per_pixel
+    return (math.floor(south / step) * step, math.floor(west / step) * step,
+            math.ceil(north / step) * step, math.ceil(east / step) * step, zoom)
+
+
+def _in_bbox(first, stop, south, west, north, east):
+    """Positions of the storms in [first, stop) whose starting point is inside the box."""
+    cells, order = _index.get()
+    if east - west >= 360:
+        west, east = -180.0, 180.0
+    else:
+        west, east = float(_lon180(west)), float(_lon180(east))
+    lon_ranges = [(west, east)] if west <= east else [(west, 180.0), (-180.0, east)]
+    rows = range(int((max(south, -90) + 90) // INDEX_DEGREES), int((min(north, 89.999) + 90) // INDEX_DEGREES) + 1)
+    candidates = []
+    for row in rows:
+        for lo, hi in lon_ranges:
+            first_cell = row * _n_lon + int((lo + 180) // INDEX_DEGREES)
+            last_cell = row * _n_lon + min(int((hi + 180) // INDEX_DEGREES), _n_lon - 1)
+            a, b = np.searchsorted(cells, [first_cell, last_cell + 1])
+            candidates.append(order[a:b])
+    positions = np.sort(np.concatenate(candidates)) if candidates else np.empty(0, dtype=np.int64)
+    positions = positions[(positions >= first) & (positions < stop)]
+
+    starts = store.starts()
+    lat = starts['Lat'].to_numpy()[positions]
+    lon = _lon180(starts['Lon'].to_numpy()[positions])
+    inside = (lat >= south) & (lat <= north)
+    inside &= ((lon >= west) & (lon <= east)) if west <= east else ((lon >= west) | (lon <= east))
+    return positions[inside]
+
+
+def _clusters(lat, lon, zoom):
+    size = CLUSTER_PIXELS * 360 / (256 * 2 ** zoom)
+    cells, inverse = np.unique(
+        np.floor((lat + 90) / size).astype(np.int64) * 1_000_000 + np.floor((_lon180(lon) + 180) / size).astype(np.int64),
+        return_inverse=True)
+    count = np.bincount(inverse, minlength=len(cells))
+    return {
+        'lat': np.bincount(inverse, weights=lat, minlength=len(cells)) / count,
+        'lon': np.bincount(inverse, weights=lon, minlength=len(cells)) / count,
+        'count': count,
+    }
+
+
+# Storms of the year range, restricted to `selected` positions when given (region filter).
+def _selected(first, stop, selected):
+    return selected[(selected >= first) & (selected < stop)]
+
+
+# True when the starting points drawn for this range depend on the map view.
+def is_active(first_year, last_year, selected=None):
+    first, stop = store.storm_range(first_year, last_year)
+    count = stop - first if selected is None else len(_selected(first, stop, selected))
+    return count > MAX_POINTS
+
+
+def starting_points(first_year, last_year, relayoutData=None, selected=None):
+    """Starting points to draw for a slider range and the current map view.
+
+    Returns (points, clusters). Below MAX_POINTS storms every starting point is returned
+    and clusters is None. Above it, only the points inside the viewport are kept,
+    through the grid index. If there are still too many, they are aggregated into
+    screen-sized clusters: a dict of lat, lon and count arrays, with points left empty.
+    The payload therefore stays bounded by MAX_POINTS or by the number of clusters
+    that fit on screen. `selected` (sorted storm positions) restricts the storms shown.
+    """
+    first, stop = store.storm_range(first_year, last_year)
+    starts = store.starts()
+    if selected is not None:
+        selected = _selected(first, stop, selected)
+    if (stop - first if selected is None else len(selected)) <= MAX_POINTS:
+        return (starts.iloc[first:stop] if selected is None else starts.take(selected)), None
+    south, west, north, east, zoom = viewport(relayoutData)
+    positions = _in_bbox(first, stop, south, west, north, east)
+    if selected is not None:
+        positions = np.intersect1d(positions, selected, assume_unique=True)
+    if len(positions) <= MAX_POINTS:
+        return starts.take(positions), None
+    lat = starts['Lat'].to_numpy(dtype='float64')[positions]
+    lon = starts['Lon'].to_numpy(dtype='float64')[positions]
+    return starts.iloc[0:0], _clusters(lat, lon, zoom)
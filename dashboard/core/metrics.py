@@ -0,0 +1,168 @@
+import functools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import flask
+
+from core import figure_cache, startup
+
+# Pas de pandas au démarrage en mode rapide: le store n'est importé que par render()
+store = startup.module('core.store')
+
+logger = logging.getLogger(__name__)
+
+# Callbacks slower than this (whole request, in ms) are logged; 0 disables the log.
+SLOW_CALLBACK_MS = float(os.environ.get('HURRICANE_SLOW_CALLBACK_MS', 0))
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BYTES_BUCKETS = (1e3, 1e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7)
+ROWS_BUCKETS = (10, 100, 1e3, 1e4, 1e5, 1e6)
+
+
+class Histogram:
+    """Prometheus histogram keyed by a tuple of label values."""
+
+    def __init__(self, name, documentation, labels, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += 1
+            series[2] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for label_values, (buckets, count, total) in sorted(self._series.items()):
+                labels = ','.join(f'{k}="{v}"' for k, v in zip(self.labels, label_values))
+                for bound, bucket in zip(self.buckets, buckets):
+                    lines.append(f'{self.name}_bucket{{{labels},le="{bound:g}"}} {bucket}')
+                lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(f'{self.name}_count{{{labels}}} {count}')
+                lines.append(f'{self.name}_sum{{{labels}}} {total:.6f}')
+        return lines
+
+
+callback_seconds = Histogram(
+    'hurricane_callback_seconds', 'Wall time of Dash callbacks by phase (filter, build, serialize, total).',
+    ('callback', 'phase'), SECONDS_BUCKETS)
+callback_payload_bytes = Histogram(
+    'hurricane_callback_payload_bytes', 'Size of the JSON response of Dash callbacks.',
+    ('callback',), BYTES_BUCKETS)
+callback_rows = Histogram(
+    'hurricane_callback_rows', 'Data rows used by Dash callbacks (points drawn, track rows...).',
+    ('callback',), ROWS_BUCKETS)
+
+# Mesures du callback en cours, par thread (une requête Flask = un thread)
+_current = threading.local()
+
+
+@contextmanager
+def phase(name):
+    """Time a part of the current callback, e.g. `with metrics.phase('filter'):`."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases = getattr(_current, 'phases', None)
+        if phases is not None:
+            phases[name] = phases.get(name, 0.0) + time.perf_counter() - t0
+
+
+# Number of data rows the current callback worked on.
+def rows(count):
+    if getattr(_current, 'phases', None) is not None:
+        _current.rows = getattr(_current, 'rows', 0) + int(count)
+
+
+def instrument(func):
+    """Record the wall time of a callback, split into filter (the `phase('filter')`
+    blocks) and build (the rest). Serialization and payload size are added when the
+    Dash request ends (see init_app)."""
+    @functools.wraps(func)
+    def wrapper(*args):
+        _current.phases, _current.rows = {}, 0
+        t0 = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - t0
+            filtering = _current.phases.get('filter', 0.0)
+            callback_seconds.observe((func.__name__, 'filter'), filtering)
+            callback_seconds.observe((func.__name__, 'build'), elapsed - filtering)
+            if _current.rows:
+                callback_rows.observe((func.__name__,), _current.rows)
+            _current.callback, _current.elapsed = func.__name__, elapsed
+            _current.phases = None
+    return wrapper
+
+
+def _before_request():
+    if startup.first_request is None:
+        startup.first_request = time.perf_counter() - startup.T0
+    _current.callback = None
+    flask.g.metrics_start = time.perf_counter()
+
+
+def _after_request(response):
+    callback = getattr(_current, 'callback', None)
+    if callback is None or not flask.request.path.endswith('_dash-update-component'):
+        return response
+    total = time.perf_counter() - flask.g.metrics_start
+    size = response.calculate_content_length() or 0
+    callback_seconds.observe((callback, 'serialize'), max(total - _current.elapsed, 0.0))
+    callback_seconds.observe((callback, 'total'), total)
+    callback_payload_bytes.observe((callback,), size)
+    if SLOW_CALLBACK_MS and total * 1000 > SLOW_CALLBACK_MS:
+        logger.warning('slow callback %s: %.0f ms (callback %.0f ms), %d bytes',
+                       callback, total * 1000, _current.elapsed * 1000, size)
+    _current.callback = None
+    return response
+
+
+def _single(name, kind, documentation, value):
+    return [f'# HELP {name} {documentation}', f'# TYPE {name} {kind}', f'{name} {value}']
+
+
+def render():
+    lines = callback_seconds.render() + callback_payload_bytes.render() + callback_rows.render()
+    cache = figure_cache.figures.stats()
+    lines += _single('hurricane_figure_cache_entries', 'gauge', 'Figures in the cache.', cache['entries'])
+    lines += _single('hurricane_figure_cache_bytes', 'gauge', 'Size of the cached figures.', cache['bytes'])
+    for name in ('hits', 'misses', 'evictions'):
+        lines += _single(f'hurricane_figure_cache_{name}_total', 'counter', f'Figure cache {name}.', cache[name])
+    data = store.stats()
+    lines += _single('hurricane_store_rows', 'gauge', 'Track rows in the store (0 until loaded).', data['rows'])
+    lines += _single('hurricane_store_storms', 'gauge', 'Storms in the store (0 until loaded).', data['storms'])
+    lines += _single('hurricane_store_bytes', 'gauge', 'Memory used by the track rows.', data['bytes'])
+    lines += _single('hurricane_store_load_seconds', 'gauge', 'Time taken to load the store.', data['load_seconds'])
+    lines += _single('hurricane_store_shared', 'gauge', 'Whether the store is mapped from a shared snapshot.', int(data['shared']))
+    lines += _single('hurricane_store_generation', 'gauge', 'Version of the data in use (1 at load, +1 per refresh).', data['generation'])
+    lines += _single('hurricane_startup_first_request_seconds', 'gauge',
+                     'Time from the start of the dashboard to its first request.', startup.first_request or 0)
+    lines += ['# HELP hurricane_startup_span_seconds Duration of the last run of each startup step (loads, first builds).',
+              '# TYPE hurricane_startup_span_seconds gauge']
+    lines += [f'hurricane_startup_span_seconds{{span="{name}"}} {seconds:.6f}'
+              for name, (_, seconds, _) in list(startup.spans.items())]
+    return '\n'.join(lines) + '\n'
+
+
+def init_app(server):
+    """Time the Dash callback requests of a Flask server and serve /metrics."""
+    server.before_request(_before_request)
+    server.after_request(_after_request)
+    server.add_url_rule('/metrics', 'metrics', lambda: flask.Response(render(), mimetype='text/plain; version=0.0.4'))
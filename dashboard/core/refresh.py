@@ -0,0 +1,163 @@
+import csv
+import hmac
+import importlib
+import io
+import logging
+import os
+import re
+import sys
+import threading
+import time
+
+import flask
+
+from core import basins, startup
+
+# Pas de pandas au démarrage en mode rapide (voir core.metrics)
+snapshot, store = startup.modules('core.snapshot', 'core.store')
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two checks of the data files (or, in a worker of a server, of the
+# shared snapshot); 0 disables the background check.
+INTERVAL = float(os.environ.get('HURRICANE_REFRESH_SECONDS', 30))
+# Shared secret of POST /ingest, sent as 'Authorization: Bearer <token>'. Without it the
+# endpoint is not registered. The client address proves nothing: behind a reverse proxy
+# every request comes from 127.0.0.1.
+INGEST_TOKEN = os.environ.get('HURRICANE_INGEST_TOKEN') or None
+_BASIN = re.compile(r'^[A-Z]{2}$')
+# Modules dont les données dérivées sont publiées avec le snapshot (voir store.Derived)
+PUBLISHED = ('core.density', 'core.summary')
+
+_started = False
+_start_lock = threading.Lock()
+
+
+def check():
+    """Pick up new data: the changed CSVs, or in a worker of a server (HURRICANE_SNAPSHOT_DIR)
+    the newer snapshot published for it. Returns the new version of the store, or None."""
+    # Rien à rafraîchir tant que les données ne sont pas chargées (elles seront lues à jour)
+    if 'core.store' not in sys.modules or not store.loaded():
+        return None
+    if snapshot.DIRECTORY is not None:
+        return store.follow()
+    return store.reload()
+
+
+def _watch():
+    while True:
+        time.sleep(INTERVAL)
+        try:
+            check()
+        except Exception:
+            logger.exception('refresh of the data failed')
+
+
+# Check for new data every INTERVAL seconds in a background thread (once per process).
+def start():
+    global _started
+    with _start_lock:
+        if _started or INTERVAL <= 0:
+            return
+        _started = True
+    threading.Thread(target=_watch, name='refresh', daemon=True).start()
+
+
+def append_rows(basin, rows):
+    """Append track rows ({column: value}, as in the CSV) to data/<basin>.csv, creating
+    the file if needed. Columns missing from a row are left empty. The rows are parsed
+    as the store reads the file before anything is written: ValueError if one could
+    not be loaded (see store.parse_rows), and the file is left as it was."""
+    if not _BASIN.match(basin or ''):
+        raise ValueError(f'invalid basin code: {basin!r}')
+    path = basins.path(store.DATA_DIR, basin)
+    with open(path, 'ab+') as f:
+        f.seek(0)
+        line = f.readline().decode()
+        header = next(csv.reader([line])) if line.strip() else None
+        # Première ligne de données: les dates ajoutées doivent être dans son format
+        first = f.readline().decode().rstrip('\r\n') if header is not None else None
+        prefix = ''
+        if header is None:
+            header = store.TRACK_COLUMNS
+            line = prefix = ','.join(header) + '\n'
+        else:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                prefix = '\n'
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        for row in rows:
+            unknown = set(row) - set(header)
+            if unknown:
+                raise ValueError(f'unknown columns {sorted(unknown)} in row {row!r}')
+            writer.writerow(['' if row.get(column) is None else row[column] for column in header])
+        store.parse_rows(line.rstrip('\r\n') + '\n' + buffer.getvalue(), first or None)
+        # Une seule écriture en fin de fichier: la lecture ne voit que des lignes entières
+        f.write((prefix + buffer.getvalue()).encode())
+    return len(rows)
+
+
+def _ingest():
+    scheme, _, token = flask.request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not hmac.compare_digest(token.encode(), INGEST_TOKEN.encode()):
+        flask.abort(401)
+    payload = flask.request.get_json(silent=True) or {}
+    rows = payload.get('rows')
+    if not isinstance(rows, list) or not rows or not all(isinstance(row, dict) for row in rows):
+        return flask.jsonify(error='expected {"basin": "AL", "rows": [{column: value}, ...]}'), 400
+    try:
+        appended = append_rows(payload.get('basin'), rows)
+    except ValueError as error:
+        return flask.jsonify(error=str(error)), 400
+    if snapshot.DIRECTORY is not None:
+        # Worker d'un serveur: le processus de rafraîchissement publiera les lignes
+        return flask.jsonify(appended=appended), 202
+    version = check()
+    return flask.jsonify(appended=appended, generation=store.stats()['generation'],
+                         storms=len(version.changes['storms']) if version is not None and version.changes is not None else 0)
+
+
+# Chaque requête garde la version des données qu'elle a vue en premier. Sans store importé
+# (démarrage rapide), il n'y a pas encore de version à garder.
+def _before_request():
+    if 'core.store' in sys.modules:
+        flask.g.store_pin = store.pin()
+
+
+def _teardown_request(error=None):
+    if 'store_pin' in flask.g:
+        store.unpin(flask.g.store_pin)
+
+
+def init_app(server):
+    """Keep one version of the data per request, accept appended rows on POST /ingest
+    (only when HURRICANE_INGEST_TOKEN is set) and check for new data in the background."""
+    server.before_request(_before_request)
+    server.teardown_request(_teardown_request)
+    if INGEST_TOKEN is not None:
+        server.add_url_rule('/ingest', 'ingest', _ingest, methods=['POST'])
+    start()
+
+
+def publish(directory=None):
+    """Publish the data with the derived data of the PUBLISHED modules as a new snapshot
+    (see store.publish). Returns the new generation."""
+    for name in PUBLISHED:
+        importlib.import_module(name)
+    return store.publish(directory)
+
+
+def publisher(directory):
+    """Main loop of the process that refreshes the data of a server's workers: read the
+    sources, publish them as a snapshot in `directory`, then publish every change found
+    every INTERVAL seconds. The first generation is printed on stdout."""
+    logging.basicConfig(level=logging.INFO)
+    print(publish(directory), flush=True)
+    while INTERVAL > 0:
+        time.sleep(INTERVAL)
+        try:
+            if store.reload() is not None:
+                logger.info('published generation %s of the data', publish(directory))
+        except Exception:
+            logger.exception('refresh of the data failed')
@@ -0,0 +1,125 @@
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from core import cache
+
+# Dossier des snapshots partagés entre processus (serveur à plusieurs workers). Sans lui,
+# chaque processus charge ses propres données.
+DIRECTORY = os.environ.get('HURRICANE_SNAPSHOT_DIR')
+# Bump when the layout of the files below changes.
+SNAPSHOT_VERSION = 2
+# Générations gardées en plus de la courante: un worker peut encore lire la précédente
+KEEP_PREVIOUS = 1
+
+
+def _write_frame(directory, name, df):
+    columns = []
+    for column in df.columns:
+        values = df[column]
+        path = os.path.join(directory, f'{name}.{column}.npy')
+        # Un tableau d'objets (textes) ne se mappe pas: il est écrit en codes et catégories
+        if values.dtype == object:
+            values = values.astype('category')
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            np.save(path, values.cat.codes.to_numpy())
+            columns.append({'name': column, 'categories': values.cat.categories.tolist(),
+                            'ordered': bool(values.cat.ordered)})
+        else:
+            np.save(path, values.to_numpy())
+            columns.append({'name': column})
+    return {'rows': len(df), 'columns': columns}
+
+
+def _write_value(directory, name, value):
+    if isinstance(value, pd.DataFrame):
+        return _write_frame(directory, name, value)
+    # Tuple de tableaux et de valeurs JSON (une grille, ses bornes...)
+    items = []
+    for i, item in enumerate(value):
+        if isinstance(item, np.ndarray):
+            np.save(os.path.join(directory, f'{name}.{i}.npy'), item)
+            items.append({'array': True})
+        else:
+            items.append({'value': item})
+    return {'items': items}
+
+
+def _read_value(directory, name, meta):
+    if 'items' not in meta:
+        return _read_frame(directory, name, meta)
+    return tuple(np.load(os.path.join(directory, f'{name}.{i}.npy'), mmap_mode='r').view(np.ndarray)
+                 if item.get('array') else item['value'] for i, item in enumerate(meta['items']))
+
+
+def _read_frame(directory, name, meta):
+    # Les colonnes restent des memmaps en lecture seule: les pages du fichier sont
+    # partagées par tous les processus qui l'ouvrent, rien n'est copié
+    data = {}
+    for column in meta['columns']:
+        values = np.load(os.path.join(directory, f"{name}.{column['name']}.npy"), mmap_mode='r').view(np.ndarray)
+        if 'categories' in column:
+            values = pd.Categorical.from_codes(values, categories=column['categories'], ordered=column['ordered'])
+        data[column['name']] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def _current_path(directory):
+    return os.path.join(directory, 'current.json')
+
+
+def publish(frames, directory=None, changes=None):
+    """Write `frames` ({name: DataFrame} of numeric, datetime, categorical and text
+    columns, or {name: tuple} of arrays and JSON values) as a new generation of the
+    snapshot, then make it the current one.
+
+    Every column or array is a .npy file that other processes map with `attach`, so the
+    data is in memory once however many workers read it; text columns come back as
+    categoricals. `changes` (JSON) is handed to them
+    with the frames, e.g. what differs from the previous generation.
+    """
+    directory = directory or DIRECTORY
+    generation = f'{time.time_ns():x}'
+    target = os.path.join(directory, generation)
+    tmp = f'{target}.tmp'
+    os.makedirs(tmp)
+    meta = {'version': SNAPSHOT_VERSION, 'changes': changes,
+            'frames': {name: _write_value(tmp, name, value) for name, value in frames.items()}}
+    cache.write_json(os.path.join(tmp, 'meta.json'), meta)
+    os.replace(tmp, target)
+    cache.write_json(_current_path(directory), {'generation': generation})
+
+    # Les anciennes générations sont supprimées; un processus qui les a déjà mappées
+    # garde ses pages (le fichier n'est libéré qu'à la fermeture du dernier mapping)
+    generations = sorted(name for name in os.listdir(directory) if name != 'current.json' and name != generation)
+    for old in generations[:max(len(generations) - KEEP_PREVIOUS, 0)]:
+        shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+    return generation
+
+
+# Name of the current generation, or None when nothing was published.
+def current(directory=None):
+    directory = directory or DIRECTORY
+    if directory is None:
+        return None
+    pointer = cache.read_json(_current_path(directory))
+    return pointer['generation'] if pointer is not None else None
+
+
+def attach(directory=None, generation=None):
+    """The current (or given) generation of the snapshot: {'generation', 'frames',
+    'changes'}, the frames as zero-copy read-only views. None when there is no snapshot,
+    the generation was removed meanwhile or it was written by another version."""
+    directory = directory or DIRECTORY
+    generation = generation or current(directory)
+    if generation is None:
+        return None
+    target = os.path.join(directory, generation)
+    meta = cache.read_json(os.path.join(target, 'meta.json'))
+    if meta is None or meta.get('version') != SNAPSHOT_VERSION:
+        return None
+    return {'generation': generation, 'changes': meta.get('changes'),
+            'frames': {name: _read_value(target, name, frame) for name, frame in meta['frames'].items()}}
@@ -0,0 +1,92 @@
+import numpy as np
+
+from core import startup, store
+
+try:
+    import shapely
+except ImportError:  # shapely is optional: without it the region filter is disabled
+    shapely = None
+
+
+def _lon180(lon):
+    return (np.asarray(lon, dtype='float64') + 180) % 360 - 180
+
+
+# R-tree (STRtree) des segments de trajectoire, et pour chaque segment la position de son
+# ouragan dans l'index de store. Reconstruit pour chaque version (un STRtree est immuable).
+@startup.timed
+def _build():
+    tracks = store.tracks()
+    _, offsets = store.storm_index()
+    lat = tracks['Lat'].to_numpy(dtype='float64')
+    lon = _lon180(tracks['Lon'])
+    storms = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    # Segment i -> i + 1 à l'intérieur d'un ouragan; un ouragan d'un seul point garde un
+    # segment de longueur nulle pour rester interrogeable
+    rows = np.flatnonzero(storms[:-1] == storms[1:])
+    single = np.flatnonzero(np.diff(offsets) == 1)
+    lon0, lat0 = np.r_[lon[rows], lon[offsets[single]]], np.r_[lat[rows], lat[offsets[single]]]
+    lon1, lat1 = np.r_[lon[rows + 1], lon[offsets[single]]], np.r_[lat[rows + 1], lat[offsets[single]]]
+    segment_storms = np.r_[storms[rows], single]
+
+    # Un segment qui traverse l'antiméridien est remplacé par ses deux moitiés, chacune
+    # prolongée hors de [-180, 180] de l'autre côté
+    shift = np.where(lon1 - lon0 > 180, -360.0, np.where(lon0 - lon1 > 180, 360.0, 0.0))
+    crossing = np.flatnonzero(shift)
+    lon0 = np.r_[lon0, lon0[crossing] - shift[crossing]]
+    lat0 = np.r_[lat0, lat0[crossing]]
+    lon1 = np.r_[lon1 + shift, lon1[crossing]]
+    lat1 = np.r_[lat1, lat1[crossing]]
+    segment_storms = np.r_[segment_storms, segment_storms[crossing]]
+
+    lines = shapely.linestrings(np.stack([np.column_stack([lon0, lat0]), np.column_stack([lon1, lat1])], axis=1))
+    return shapely.STRtree(lines), segment_storms
+
+
+_segments = store.Derived(_build)
+
+
+def _storms_intersecting(geometries):
+    tree, segment_storms = _segments.get()
+    segments = tree.query(geometries, predicate='intersects')[1]
+    return np.unique(segment_storms[segments])
+
+
+def available():
+    return shapely is not None
+
+
+def storms_in_bbox(south, west, north, east):
+    """Positions (in store.starts() order) of the storms whose track crosses the box.
+
+    The box may span the antimeridian (west > east once wrapped to [-180, 180)).
+    """
+    if east - west >= 360:
+        west, east = -180.0, 180.0
+    else:
+        west, east = float(_lon180(west)), float(_lon180(east))
+    lon_ranges = [(west, east)] if west <= east else [(west, 180.0), (-180.0, east)]
+    return _storms_intersecting(shapely.box([lo for lo, _ in lon_ranges], south, [hi for _, hi in lon_ranges], north))
+
+
+def storms_in_polygon(lon, lat):
+    """Positions of the storms whose track crosses the polygon with these vertices."""
+    # Les longitudes du lasso ne sont pas ramenées dans [-180, 180] (le polygone serait
+    # coupé en deux): il est interrogé tel quel et décalé d'un tour de chaque côté
+    lon = np.asarray(lon, dtype='float64')
+    polygons = [shapely.make_valid(shapely.polygons(np.column_stack([lon + shift, lat]))) for shift in (-360, 0, 360)]
+    return _storms_intersecting(np.array(polygons))
+
+
+def storms_in_region(region):
+    """Storm positions for a region from the map: {'bbox': [[lon, lat], [lon, lat]]} or
+    {'lasso': [[lon, lat], ...]}; None when there is no usable region."""
+    if not region or shapely is None:
+        return None
+    if region.get('bbox'):
+        (lon0, lat0), (lon1, lat1) = region['bbox']
+        return storms_in_bbox(min(lat0, lat1), min(lon0, lon1), max(lat0, lat1), max(lon0, lon1))
+    if region.get('lasso') and len(region['lasso']) >= 3:
+        vertices = np.asarray(region['lasso'], dtype='float64')
+        return storms_in_polygon(vertices[:, 0], vertices[:, 1])
+    return None
@@ -0,0 +1,67 @@
+import functools
+import importlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# HURRICANE_FAST_STARTUP=1: nothing is loaded before the first request that needs it. The
+# pages reach the data modules (and pandas, pyarrow, shapely...) through stand-ins
+# that import them on first use, and the initial figures are not built in the background.
+FAST = os.environ.get('HURRICANE_FAST_STARTUP', '0') != '0'
+
+# Début du chronométrage: import de ce module, au tout début du démarrage du dashboard
+T0 = time.perf_counter()
+
+# Last run of each span of the start: name -> (start in seconds since T0, duration in
+# seconds, thread name). One entry per name, so steps that run again later (refresh of
+# the data) do not make it grow.
+spans = {}
+# Seconds from T0 to the first HTTP request (set by core.metrics)
+first_request = None
+_lock = threading.Lock()
+
+
+class _Deferred:
+    """Stand-in for a module that imports it on the first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        # import_module est protégé par le verrou d'import: sûr entre threads
+        return getattr(importlib.import_module(self._name), attr)
+
+    def __repr__(self):
+        return f'<deferred module {self._name!r}>'
+
+
+def module(name):
+    """The module `name`, or a stand-in importing it on first use in fast-startup mode."""
+    return _Deferred(name) if FAST else importlib.import_module(name)
+
+
+def modules(*names):
+    return tuple(module(name) for name in names)
+
+
+@contextmanager
+def span(name):
+    """Record the wall time of a step of the start (loading, first build of a figure...)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _lock:
+            spans[name] = (start - T0, time.perf_counter() - start, threading.current_thread().name)
+
+
+# Span around every call of a builder (module.function), e.g. the load of the store.
+def timed(func):
+    name = f'{func.__module__}.{func.__name__}'
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with span(name):
+            return func(*args, **kwargs)
+    return wrapper
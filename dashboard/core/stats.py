@@ -0,0 +1,102 @@
+import functools
+import math
+from statistics import NormalDist
+
+import numpy as np
+
+from core import aggregates, store
+
+CONFIDENCE_LEVEL = 0.95
+
+
+def _t_quantile(p, df):
+    # Quantile de la loi de Student par le développement de Cornish-Fisher autour du
+    # quantile normal (Abramowitz & Stegun 26.7.5): erreur < 5e-4 dès 5 degrés de liberté
+    z = NormalDist().inv_cdf(p)
+    if not math.isfinite(df):
+        return z
+    g1 = (z ** 3 + z) / 4
+    g2 = (5 * z ** 5 + 16 * z ** 3 + 3 * z) / 96
+    g3 = (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / 384
+    g4 = (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / 92160
+    return z + g1 / df + g2 / df ** 2 + g3 / df ** 3 + g4 / df ** 4
+
+
+def _ranks(values):
+    # Rangs (à partir de 1) avec la moyenne des rangs pour les ex aequo
+    _, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    return (np.cumsum(counts) - (counts - 1) / 2)[inverse]
+
+
+def pearson(x, y):
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    dx, dy = x - x.mean(), y - y.mean()
+    denominator = math.sqrt((dx @ dx) * (dy @ dy))
+    return float(dx @ dy / denominator) if denominator else math.nan
+
+
+def spearman(x, y):
+    return pearson(_ranks(np.asarray(x)), _ranks(np.asarray(y)))
+
+
+def ols(x, y, level=CONFIDENCE_LEVEL):
+    """Least-squares line y = slope * x + intercept, in closed form.
+
+    Also returns the coefficient of determination, the standard error of the
+    regression and what `band` needs for the confidence interval of the mean.
+    """
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    n = len(x)
+    x_mean, y_mean = x.mean(), y.mean()
+    sxx = float(((x - x_mean) ** 2).sum())
+    slope = float(((x - x_mean) * (y - y_mean)).sum() / sxx) if sxx else math.nan
+    intercept = y_mean - slope * x_mean
+    residuals = y - (slope * x + intercept)
+    sse = float(residuals @ residuals)
+    sst = float(((y - y_mean) ** 2).sum())
+    return {
+        'n': n, 'slope': slope, 'intercept': float(intercept),
+        'r2': 1 - sse / sst if sst else math.nan,
+        'stderr': math.sqrt(sse / (n - 2)) if n > 2 else math.nan,
+        'x_mean': float(x_mean), 'sxx': sxx,
+        't': _t_quantile(0.5 + level / 2, n - 2) if n > 2 else math.nan,
+    }
+
+
+def band(fit, x):
+    """Fitted values at `x` and the lower/upper bounds of their confidence interval."""
+    x = np.asarray(x, dtype='float64')
+    fitted = fit['slope'] * x + fit['intercept']
+    half = fit['t'] * fit['stderr'] * np.sqrt(1 / fit['n'] + (x - fit['x_mean']) ** 2 / fit['sxx'])
+    return fitted, fitted - half, fitted + half
+
+
+def temperature_trend(basin=aggregates.ALL_BASINS, first_year=None, last_year=None):
+    """Mean temperature vs number of track records of a basin over a range of years
+    (bounds included, None for no bound): the points, their OLS line with its confidence
+    band, and the Pearson and Spearman correlations. Cached per selection and version of
+    the data."""
+    return _temperature_trend(store.generation(), basin, first_year, last_year)
+
+
+@functools.lru_cache(maxsize=64)
+def _temperature_trend(generation, basin, first_year, last_year):
+    points = aggregates.temperature_vs_count(basin)
+    if first_year is not None:
+        points = points[points['year'] >= first_year]
+    if last_year is not None:
+        points = points[points['year'] <= last_year]
+    x = points['mean_temp'].to_numpy(dtype='float64')
+    y = points['count'].to_numpy(dtype='float64')
+    fit = ols(x, y)
+    line_x = np.sort(x)
+    fitted, lower, upper = band(fit, line_x)
+    return {
+        'points': points.reset_index(drop=True),
+        'fit': fit,
+        'pearson': pearson(x, y),
+        'spearman': spearman(x, y),
+        'line': {'x': line_x, 'y': fitted, 'lower': lower, 'upper': upper},
+    }
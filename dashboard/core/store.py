@@ -0,0 +1,776 @@
+import io
+import logging
+import os
+import threading
+import time
+import warnings
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from core import basins, cache, ingest, snapshot, startup
+
+# Copy-on-write makes every frame handed out below behave as a read-only view:
+# a page that assigns a column gets its own copy instead of mutating the store.
+pd.set_option('mode.copy_on_write', True)
+
+DATA_DIR = os.environ.get(
+    'HURRICANE_DATA_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data'))
+TEMPERATURES_PATH = os.path.join(DATA_DIR, 'GlobalTemperatures.csv')
+MIN_YEAR = 1950
+KNOTS_TO_KMH = 1.852
+
+TRACK_COLUMNS = ['Key', 'Name', 'DateTime', 'Record', 'Status', 'Lat', 'Lon', 'Wind', 'Pressure']
+TRACK_DTYPES = {
+    'Key': str, 'Name': str, 'DateTime': str, 'Record': str, 'Status': str,
+    'Lat': 'float32', 'Lon': 'float32', 'Wind': 'float32', 'Pressure': 'float32',
+}
+CATEGORY_COLUMNS = ['basin', 'Key', 'Name', 'Record', 'Status']
+# Clé ATCF 'BBNNYYYY' (bassin, numéro, année), dont storm_code tire l'identifiant
+KEY_PATTERN = r'^[A-Z]{2}\d{6}$'
+# Versions dont les données dérivées sont gardées (voir Derived): la courante et la
+# précédente, encore utilisée par les requêtes commencées avant le dernier refresh
+KEEP_VERSIONS = 2
+
+_lock = threading.Lock()
+# Une seule relecture des sources (ou publication) à la fois
+_reload_lock = threading.Lock()
+# Version courante des données (voir Version), remplacée d'un bloc par _swap()
+_current = None
+# Version gardée par la requête en cours sur ce thread (voir pin)
+_pinned = threading.local()
+# État de chaque fichier source à sa dernière lecture (voir reload)
+_sources = {}
+# Nom -> Derived publié avec le snapshot (voir publish)
+_published = {}
+_stats = {'rows': 0, 'storms': 0, 'bytes': 0, 'load_seconds': 0.0, 'shared': False, 'generation': 0}
+_MISSING = object()
+
+logger = logging.getLogger(__name__)
+
+
+# Typage et filtre d'un chunk brut: seuls les points depuis MIN_YEAR sont gardés
+def _prepare_tracks(chunk):
+    chunk['DateTime'] = pd.to_datetime(chunk['DateTime'], errors='coerce').dt.tz_localize(None)
+    chunk = chunk[chunk['DateTime'] >= f'{MIN_YEAR}-01-01']
+    chunk['Key'] = chunk['Key'].str.strip()
+    # Une clé dans un autre format n'a pas d'identifiant: ses points sont ignorés
+    valid = chunk['Key'].str.match(KEY_PATTERN, na=False)
+    if not valid.all():
+        logger.warning('ignored %d track rows with an invalid storm key, e.g. %r',
+                       (~valid).sum(), chunk['Key'][~valid].iloc[0])
+        chunk = chunk[valid]
+    return chunk
+
+
+def parse_rows(data, first=None):
+    """Track rows of the CSV text `data` (header included), read as the files are.
+
+    Raises ValueError for a row the store could not load: a value of the wrong type, a
+    missing date or one in another format than `first` (a row already in the file, read
+    with them as in a chunk of the file), or a key that is not an ATCF key.
+    """
+    if first is not None:
+        header, _, rows = data.partition('\n')
+        data = f'{header}\n{first}\n{rows}'
+    raw = pd.read_csv(io.StringIO(data), usecols=TRACK_COLUMNS, dtype=TRACK_DTYPES)
+    with warnings.catch_warnings():
+        # Fuseaux mélangés: avertissement de pandas 2.2, erreur dans les versions suivantes
+        warnings.simplefilter('ignore', FutureWarning)
+        times = pd.to_datetime(raw['DateTime'], errors='coerce')
+    # Fuseaux horaires différents: la colonne reste en objets, la lecture échouerait
+    if not pd.api.types.is_datetime64_any_dtype(times):
+        raise ValueError('dates with different time zones')
+    invalid = times.isna() | ~raw['Key'].str.strip().str.match(KEY_PATTERN, na=False)
+    if first is not None:
+        raw, invalid = raw.iloc[1:], invalid.iloc[1:]
+    if invalid.any():
+        raise ValueError(f'invalid row: {raw[invalid].iloc[0].to_dict()!r}')
+    return _prepare_tracks(raw)
+
+
+def _categorize(df, basin):
+    df['basin'] = pd.Categorical([basin] * len(df))
+    for column in CATEGORY_COLUMNS:
+        df[column] = df[column].astype('category')
+    return df
+
+
+def _parse_basin(path):
+    # Lecture par chunks: le CSV complet (rayons de vent compris) n'est jamais en mémoire
+    df = ingest.read_csv(path, TRACK_COLUMNS, TRACK_DTYPES, _prepare_tracks)
+    return _categorize(df, os.path.splitext(os.path.basename(path))[0])
+
+
+def _read_basin(basin):
+    return cache.cached_frame(basins.path(DATA_DIR, basin), basin, _parse_basin)
+
+
+# Points d'un bassin avec leurs colonnes dérivées, pour une nouvelle version (voir Version)
+def _load_basin(basin):
+    path = basins.path(DATA_DIR, basin)
+    df = _add_derived(_read_basin(basin))
+    # Relevé après la lecture: une ligne ajoutée pendant celle-ci n'est pas relue deux fois
+    _sources[path] = cache.file_state(path)
+    return df
+
+
+def _add_derived(df):
+    df['year'] = df['DateTime'].dt.year.astype('int16')
+    df['Wind_kmh'] = (df['Wind'] * KNOTS_TO_KMH).astype('float32')
+    return df
+
+
+@startup.timed
+def _build_tracks(loaded=None, names=None):
+    # Un seul frame pour les bassins `names` (par défaut, tous ceux trouvés dans DATA_DIR),
+    # avec une colonne catégorielle 'basin' (catégories fusionnées, sans repasser par des
+    # colonnes object). Les bassins déjà lus (`loaded`, bassin -> points) ne sont pas relus.
+    loaded = loaded or {}
+    names = basins.available(DATA_DIR) if names is None else names
+    df = ingest.concat([loaded[basin] if basin in loaded else _load_basin(basin) for basin in names])
+    # Order storms by genesis time. Ties are broken by the first row of each storm, so each
+    # storm stays a contiguous block even when its later points were appended at the end
+    # of the file; the sort is stable, so its points stay in file order.
+    grouped = df.groupby('Key', observed=True, sort=False)
+    genesis = grouped['DateTime'].transform('min')
+    order = np.lexsort((grouped.ngroup().to_numpy(), genesis.to_numpy()))
+    return df.take(order).reset_index(drop=True)
+
+
+# Identifiant numérique stable d'un ouragan, tiré de sa clé ATCF 'BBNNYYYY' (bassin,
+# numéro, année): AL121985 -> (0 * 26 + 11) * 10**6 + 12 * 10**4 + 1985. Contrairement à
+# une position dans l'index, il ne change pas quand de nouvelles données arrivent.
+def storm_code(key):
+    key = str(key).strip()
+    return ((ord(key[0]) - 65) * 26 + ord(key[1]) - 65) * 10**6 + int(key[2:4]) * 10**4 + int(key[4:8])
+
+
+def storm_key(code):
+    code = int(code)
+    letters, number, year = code // 10**6, code // 10**4 % 100, code % 10**4
+    return f'{chr(65 + letters // 26)}{chr(65 + letters % 26)}{number:02d}{year:04d}'
+
+
+def _hover_text(starts):
+    return ('Name: ' + starts['Name'].astype(str) + '<br>' +
+            'Key: ' + starts['Key'].astype(str) + '<br>' +
+            'DateTime: ' + starts['DateTime'].dt.strftime('%Y-%m-%d %H:%M:%S') + '<br>' +
+            'Wind: ' + starts['Wind'].astype(str) + '<br>' +
+            'Pressure: ' + starts['Pressure'].astype(str))
+
+
+def _storm_boundaries(df):
+    codes = df['Key'].cat.codes.to_numpy()
+    firsts = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+    return np.concatenate(([0], firsts, [len(df)]))
+
+
+# Lignes des ouragans aux positions données, mises bout à bout, et les bornes de chaque
+# ouragan dans ce résultat (comme `offsets`)
+def _rows_at(offsets, positions):
+    positions = np.asarray(positions, dtype='int64')
+    firsts = offsets[positions]
+    counts = offsets[positions + 1] - firsts
+    bounds = np.concatenate(([0], np.cumsum(counts))).astype('int64')
+    return np.repeat(firsts - bounds[:-1], counts) + np.arange(bounds[-1]), bounds
+
+
+def _build_starts(tracks, offsets, previous=None, changed=None):
+    # Premier point de chaque ouragan
+    starts = tracks.take(offsets[:-1]).reset_index(drop=True)
+    # Texte de survol et identifiant numérique calculés une fois, découpés ensuite par
+    # index. Après un refresh, ceux des ouragans inchangés viennent de la version précédente.
+    keys = starts['Key'].astype(str)
+    old = np.full(len(starts), -1)
+    if previous is not None:
+        old = pd.Index(previous.starts['Key'].astype(str)).get_indexer(keys)
+    known = old >= 0
+    codes = np.empty(len(starts), dtype='int64')
+    hover = np.empty(len(starts), dtype=object)
+    if known.any():
+        codes[known] = previous.starts['storm_code'].to_numpy()[old[known]]
+    if not known.all():
+        codes[~known] = keys[~known].map(storm_code).to_numpy()
+    stale = ~known if changed is not None else np.ones(len(starts), dtype=bool)
+    if changed is not None:
+        stale |= np.isin(codes, changed)
+    if not stale.all():
+        hover[~stale] = previous.starts['hover'].to_numpy()[old[~stale]]
+    if stale.any():
+        hover[stale] = _hover_text(starts[stale]).to_numpy()
+    starts['hover'] = hover
+    starts['storm_code'] = codes
+    return starts
+
+
+# (bassin, année) des points et années de genèse des ouragans `codes` dans une version
+def _touched(version, codes):
+    positions = np.flatnonzero(np.isin(version.starts['storm_code'].to_numpy(), codes))
+    rows, _ = _rows_at(version.storm_offsets, positions)
+    points = version.tracks[['basin', 'year']].take(rows)
+    # to_numpy: astype(str) échoue sur une colonne catégorielle vide (pandas 2.2 + NumPy 2)
+    return (set(zip(points['basin'].to_numpy().tolist(), points['year'].to_numpy().tolist())),
+            set(version.storm_years[positions].tolist()))
+
+
+class Version:
+    """One immutable version of the data: the tracks, their storm index and the temperatures.
+
+    A refresh never modifies a version: it builds the next one and swaps it in, and a
+    request keeps the version it started with (see pin). `changes` tells what differs
+    from the previous version, so that derived data is updated instead of rebuilt (see
+    Derived): the codes of the storms added, modified or removed ('storms'), the
+    (basin, year) of their points ('pairs') and their genesis years ('years'), before and
+    after; 'temperatures' is True when the temperatures were re-read. It is None when
+    everything may differ (first load).
+
+    Without `tracks` (first load from the CSVs), the basins are read one at a time, the
+    first time a view asks for one (see basin); `tracks` and the storm index are built
+    at their first use, from the basins already read and the others. `derived` holds
+    what a shared snapshot brings besides the rows: 'starts' and the values of the named
+    Derived.
+    """
+
+    def __init__(self, generation, tracks, temperatures, previous=None, changed=None,
+                 temperatures_changed=True, token=None, base=None, loaded=None, derived=None):
+        self.generation = generation
+        self.temperatures = temperatures
+        # Génération du snapshot partagé d'où viennent les données, et celle de la version
+        # dont elles ont été tirées par un refresh (voir publish)
+        self.token = token
+        self.base = base
+        self.derived = derived or {}
+        # Bassin -> ses points, lus un à un tant que tracks n'est pas construit
+        self._basins = dict(loaded or {})
+        self._lock = threading.Lock()
+        if tracks is None:
+            self.basin_names = basins.available(DATA_DIR)
+        else:
+            self.basin_names = tuple(str(basin) for basin in tracks['basin'].cat.categories)
+            self._index(tracks, previous, changed)
+        self.changes = None
+        if previous is not None and changed is not None:
+            codes = np.unique(np.asarray(changed, dtype='int64'))
+            pairs_before, years_before = _touched(previous, codes)
+            pairs_after, years_after = _touched(self, codes)
+            self.changes = {'storms': codes, 'pairs': pairs_before | pairs_after,
+                            'years': sorted(years_before | years_after), 'temperatures': temperatures_changed}
+
+    def _index(self, tracks, previous=None, changed=None):
+        # Index des ouragans triés par date de genèse: storm_years[i] est l'année de départ
+        # du i-ème ouragan, ses points sont les lignes storm_offsets[i]:storm_offsets[i + 1]
+        self.storm_offsets = _storm_boundaries(tracks)
+        self.starts = self.derived.get('starts')
+        if self.starts is None:
+            self.starts = _build_starts(tracks, self.storm_offsets, previous, changed)
+        self.storm_years = self.starts['year'].to_numpy()
+        # Key -> position de l'ouragan dans l'index ci-dessus
+        self.storm_positions = {key: i for i, key in enumerate(self.starts['Key'].astype(str))}
+        # En dernier: sa présence indique une version complète (voir complete)
+        self.tracks = tracks
+
+    # Appelé pour un attribut absent: tracks et l'index d'une version lue bassin par bassin
+    def __getattr__(self, name):
+        if name not in _INDEX_ATTRIBUTES:
+            raise AttributeError(name)
+        with self._lock:
+            if not self.complete:
+                t0 = time.perf_counter()
+                self._index(_build_tracks(self._basins, self.basin_names))
+                self._basins = {}
+                _stats['load_seconds'] += time.perf_counter() - t0
+                _set_stats(self)
+        return self.__dict__[name]
+
+    @property
+    def complete(self):
+        return 'tracks' in self.__dict__
+
+    def basin(self, basin):
+        """Points of one of the available basins. Before tracks is built, only that basin's
+        file (or cache) is read, once for this version; tracks then reuses it."""
+        if not self.complete:
+            with self._lock:
+                if not self.complete:
+                    if basin not in self._basins:
+                        self._basins[basin] = _load_basin(basin)
+                    return self._basins[basin]
+        return self.tracks[self.tracks['basin'] == basin].reset_index(drop=True)
+
+
+_INDEX_ATTRIBUTES = ('tracks', 'starts', 'storm_offsets', 'storm_years', 'storm_positions')
+
+
+def _prepare_temperatures(chunk):
+    chunk['dt'] = pd.to_datetime(chunk['dt'], errors='coerce')
+    chunk = chunk[chunk['dt'].dt.year >= MIN_YEAR]
+    chunk['year'] = chunk['dt'].dt.year.astype('int16')
+    return chunk
+
+
+def _parse_temperatures(path):
+    return ingest.read_csv(path, ['dt', 'LandAverageTemperature'],
+                           {'LandAverageTemperature': 'float32'}, _prepare_temperatures)
+
+
+@startup.timed
+def _build_temperatures():
+    return cache.cached_frame(TEMPERATURES_PATH, 'GlobalTemperatures', _parse_temperatures)
+
+
+def _source_paths():
+    return [basins.path(DATA_DIR, basin) for basin in basins.available(DATA_DIR)] + [TEMPERATURES_PATH]
+
+
+def _set_stats(version):
+    _stats.update(shared=version.token is not None, generation=version.generation)
+    # Taille inconnue tant que seuls quelques bassins sont lus
+    if version.complete:
+        _stats.update(rows=len(version.tracks), storms=len(version.starts),
+                      bytes=int(version.tracks.memory_usage(deep=True).sum()))
+
+
+def _load():
+    global _current
+    with _lock:
+        if _current is not None:
+            return
+        t0 = time.perf_counter()
+        # Snapshot publié par le processus parent (serveur à plusieurs workers): les
+        # colonnes sont mappées en lecture seule au lieu d'être chargées par chaque worker
+        shared = snapshot.attach()
+        if shared is not None:
+            version = Version(1, shared['frames']['tracks'], shared['frames']['temperatures'],
+                              token=shared['generation'], derived=_derived(shared))
+        else:
+            # Les bassins ne sont lus qu'à la première demande (voir Version.basin)
+            version = Version(1, None, _build_temperatures())
+            if os.path.exists(TEMPERATURES_PATH):
+                _sources[TEMPERATURES_PATH] = cache.file_state(TEMPERATURES_PATH)
+        _stats['load_seconds'] = time.perf_counter() - t0
+        _set_stats(version)
+        _current = version
+
+
+# Ce que le snapshot apporte en plus des lignes et des températures (voir Version)
+def _derived(shared):
+    return {name: value for name, value in shared['frames'].items() if name not in ('tracks', 'temperatures')}
+
+
+def _latest():
+    if _current is None:
+        _load()
+    return _current
+
+
+def _swap(tracks, temperatures, changed=None, temperatures_changed=True, token=None, base=None, derived=None):
+    # Appelé sous _reload_lock: la version suivante est calculée à côté de la courante,
+    # puis une seule affectation la rend visible aux nouvelles requêtes
+    global _current
+    previous = _latest()
+    # Une version dont les bassins ne sont pas tous lus n'est pas complétée pour cela
+    version = Version(previous.generation + 1, tracks, temperatures, previous if previous.complete else None,
+                      changed, temperatures_changed, token, base, derived=derived)
+    _current = version
+    _set_stats(version)
+    return version
+
+
+def current():
+    """The version of the data in use: the one pinned by the current request, else the latest."""
+    if getattr(_pinned, 'active', False):
+        if _pinned.version is None:
+            _pinned.version = _latest()
+        return _pinned.version
+    return _latest()
+
+
+# Keep the version current at the first use of the data for the rest of this thread's
+# request, even if a refresh swaps in a new one meanwhile (see core.refresh). Returns
+# what unpin() restores at the end of the request.
+def pin():
+    saved = getattr(_pinned, 'active', False), getattr(_pinned, 'version', None)
+    _pinned.active, _pinned.version = True, None
+    return saved
+
+
+def unpin(saved=(False, None)):
+    _pinned.active, _pinned.version = saved
+
+
+@contextmanager
+def pinned(version=None):
+    """Use `version` (default: the current one) for every read of the block."""
+    version = version if version is not None else current()
+    saved = getattr(_pinned, 'active', False), getattr(_pinned, 'version', None)
+    _pinned.active, _pinned.version = True, version
+    try:
+        yield version
+    finally:
+        _pinned.active, _pinned.version = saved
+
+
+# Number of the version in use, e.g. to key caches of derived data.
+def generation():
+    return current().generation
+
+
+class Derived:
+    """Data derived from the store (aggregates, index...), kept per version.
+
+    `build()` computes it from scratch; `update(previous, changes)`, when given, from its
+    value for the previous version and the changes of the current one (see Version).
+    Both run with that version pinned. The values of the last KEEP_VERSIONS versions are
+    kept, so requests still on the previous version find theirs. With a `name`, the value
+    (a DataFrame, or a tuple of arrays and JSON values) is published with the snapshot of
+    the data, and the workers of a server map it instead of computing their own.
+    """
+
+    def __init__(self, build, update=None, name=None):
+        self._build = build
+        self._update = update
+        self._name = name
+        self._values = {}
+        self._lock = threading.Lock()
+        if name is not None:
+            _published[name] = self
+
+    def get(self):
+        version = current()
+        value = self._values.get(version.generation, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._lock:
+            value = self._values.get(version.generation, _MISSING)
+            if value is not _MISSING:
+                return value
+            previous = self._values.get(version.generation - 1, _MISSING)
+            with pinned(version):
+                if self._name in version.derived:
+                    value = version.derived[self._name]
+                elif self._update is not None and version.changes is not None and previous is not _MISSING:
+                    value = self._update(previous, version.changes)
+                else:
+                    value = self._build()
+            self._values[version.generation] = value
+            for old in sorted(self._values)[:-KEEP_VERSIONS]:
+                del self._values[old]
+        return value
+
+
+# Points ajoutés à un fichier depuis sa dernière lecture (état `old`), lus seuls, et
+# l'état du fichier après eux; None si le fichier n'a pas seulement grandi (réécrit...)
+def _read_appended(path, old):
+    with open(path, 'rb') as f:
+        header = f.readline()
+        start = max(old['size'] - cache.TAIL_BYTES, 0)
+        f.seek(start)
+        before = f.read(old['size'] - start)
+        if not before.endswith(b'\n') or cache.digest(before) != old['tail']:
+            return None
+        appended = f.read()
+    # Une ligne en cours d'écriture est laissée pour la lecture suivante
+    appended = appended[:appended.rfind(b'\n') + 1]
+    state = cache.file_state(path, old['size'] + len(appended))
+    raw = pd.read_csv(io.BytesIO(header + appended), usecols=TRACK_COLUMNS, dtype=TRACK_DTYPES)
+    rows = _categorize(_prepare_tracks(raw).reset_index(drop=True), os.path.splitext(os.path.basename(path))[0])
+    return _add_derived(rows), state
+
+
+# Empreinte du contenu de chaque bloc de lignes bounds[i]:bounds[i + 1] de `df` (les
+# points d'un ouragan): le rang de chaque point compte, donc leur ordre aussi
+def _block_hashes(df, bounds):
+    if not len(df):
+        return np.zeros(len(bounds) - 1, dtype='uint64')
+    hashes = pd.util.hash_pandas_object(df[TRACK_COLUMNS], index=False).to_numpy()
+    within = np.arange(len(df)) - np.repeat(bounds[:-1], np.diff(bounds))
+    return np.add.reduceat(hashes * (within.astype('uint64') + np.uint64(1)), bounds[:-1])
+
+
+# Empreinte du contenu de chaque ouragan (ses points, dans l'ordre), par Key
+def _storm_hashes(df):
+    keys = df['Key'].cat.codes.to_numpy()
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    firsts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.empty(0, dtype='int64')
+    sums = _block_hashes(df.take(order), np.r_[firsts, len(keys)])
+    return pd.Series(sums, index=df['Key'].cat.categories[keys[firsts]].astype(str))
+
+
+def _changed_keys(old, new):
+    old, new = _storm_hashes(old), _storm_hashes(new)
+    common = old.index.intersection(new.index)
+    modified = common[old[common].to_numpy() != new[common].to_numpy()]
+    return set(old.index.symmetric_difference(new.index)) | set(modified)
+
+
+def _replace_storms(version, codes, rows):
+    # Les ouragans `codes` sont retirés et remis avec leurs points `rows` (aucun s'ils ont
+    # disparu); les autres gardent leurs lignes, seuls les blocs sont réordonnés
+    kept = np.flatnonzero(~np.isin(version.starts['storm_code'].to_numpy(), codes))
+    kept_rows, bounds = _rows_at(version.storm_offsets, kept)
+    parts = [version.tracks.take(kept_rows).reset_index(drop=True)]
+    if len(rows):
+        # Points de chaque ouragan remis regroupés, dans l'ordre où ils ont été lus
+        rows = rows.take(np.argsort(rows['Key'].cat.codes.to_numpy(), kind='stable')).reset_index(drop=True)
+        parts.append(rows[version.tracks.columns])
+        bounds = np.concatenate((bounds, _storm_boundaries(rows)[1:] + bounds[-1]))
+    df = ingest.concat(parts)
+    if not len(df):
+        return df
+    # Même ordre que _build_tracks: par date de genèse, stable
+    genesis = np.minimum.reduceat(df['DateTime'].to_numpy(), bounds[:-1])
+    rows, _ = _rows_at(bounds, np.argsort(genesis, kind='stable'))
+    return df.take(rows).reset_index(drop=True)
+
+
+def _changed_sources(paths):
+    # Fichiers de `paths` modifiés, apparus ou supprimés depuis leur dernière lecture
+    changed = []
+    for path in paths:
+        old = _sources.get(path)
+        if os.path.exists(path) and old is not None:
+            stat = os.stat(path)
+            if (stat.st_size, stat.st_mtime_ns) == (old['size'], old['mtime_ns']):
+                continue
+        changed.append(path)
+    return changed
+
+
+def _reload_partial(version):
+    # Version dont tous les bassins ne sont pas lus: les bassins non lus le seront à jour,
+    # seuls ceux déjà lus qui ont changé sont oubliés par la version suivante
+    global _current
+    names = basins.available(DATA_DIR)
+    paths = [basins.path(DATA_DIR, basin) for basin in version._basins] + [TEMPERATURES_PATH]
+    changed = _changed_sources(paths)
+    if not changed and names == version.basin_names:
+        return None
+    temperatures = version.temperatures
+    if TEMPERATURES_PATH in changed:
+        exists = os.path.exists(TEMPERATURES_PATH)
+        temperatures = _build_temperatures() if exists else temperatures.iloc[:0]
+        if exists:
+            _sources[TEMPERATURES_PATH] = cache.file_state(TEMPERATURES_PATH)
+        else:
+            _sources.pop(TEMPERATURES_PATH, None)
+    stale = {path for path in changed if path != TEMPERATURES_PATH}
+    for path in stale:
+        _sources.pop(path, None)
+    loaded = {basin: rows for basin, rows in version._basins.items()
+              if basin in names and basins.path(DATA_DIR, basin) not in stale}
+    # Sans changements décrits: les données dérivées sont recalculées (voir Derived)
+    version = Version(version.generation + 1, None, temperatures, loaded=loaded)
+    _current = version
+    _set_stats(version)
+    return version
+
+
+@startup.timed
+def reload():
+    """Pick up the changes of the source files since they were read and swap in the new data.
+
+    A basin file that only grew is read from where the last read stopped, and its new
+    points go to the storms they belong to; any other change re-reads the file and
+    compares every storm with the current version. Only the storms that differ are
+    re-indexed: the others keep their rows and precomputed fields. While only some
+    basins were read (see Version.basin), the changed ones are just dropped, to be read
+    again on demand. Returns the new version, or None when the data did not change.
+    """
+    with _reload_lock:
+        version = _latest()
+        if not version.complete:
+            return _reload_partial(version)
+        tracks = version.tracks
+        temperatures, temperatures_changed = version.temperatures, False
+        states = {}
+        keys = set()
+        # Bassin -> ses points pour les ouragans touchés (None: fichier supprimé)
+        basin_rows = {}
+        for path in _changed_sources(sorted(set(_sources) | set(_source_paths()))):
+            old = _sources.get(path)
+            exists = os.path.exists(path)
+            grown = exists and old is not None and os.stat(path).st_size > old['size']
+            if path == TEMPERATURES_PATH:
+                temperatures = _build_temperatures() if exists else temperatures.iloc[:0]
+                temperatures_changed = True
+                states[path] = cache.file_state(path) if exists else None
+                continue
+            basin = os.path.splitext(os.path.basename(path))[0]
+            current_rows = tracks[tracks['basin'] == basin]
+            # Même taille mais modifié: réécrit sur place, la fin ne suffit pas à le dire
+            appended = _read_appended(path, old) if grown else None
+            if not exists:
+                keys |= set(current_rows['Key'].to_numpy().tolist())
+                basin_rows[basin] = None
+                states[path] = None
+            elif appended is not None:
+                new, states[path] = appended
+                keys |= set(new['Key'].to_numpy().tolist())
+                basin_rows[basin] = [current_rows, new]
+            else:
+                new = _add_derived(_read_basin(basin))
+                states[path] = cache.file_state(path)
+                keys |= _changed_keys(current_rows, new)
+                basin_rows[basin] = [new]
+        if keys or temperatures_changed:
+            keys = sorted(keys)
+            # Points des ouragans touchés: ceux des fichiers relus, plus ceux des autres bassins
+            parts = [tracks[tracks['Key'].isin(keys) & ~tracks['basin'].isin(list(basin_rows))]]
+            parts += [rows[rows['Key'].isin(keys)] for frames in basin_rows.values() if frames for rows in frames]
+            rows = ingest.concat([part[tracks.columns].reset_index(drop=True) for part in parts])
+            codes = [storm_code(key) for key in keys]
+            version = _swap(_replace_storms(version, codes, rows), temperatures, codes, temperatures_changed,
+                            base=version.token)
+        else:
+            version = None
+        for path, state in states.items():
+            if state is None:
+                _sources.pop(path, None)
+            else:
+                _sources[path] = state
+        return version
+
+
+def follow(directory=None):
+    """Attach the current shared snapshot when it is newer than the data in use (the
+    workers of a server, see publish). Returns the new version, or None."""
+    with _reload_lock:
+        version = _latest()
+        generation = snapshot.current(directory)
+        if generation is None or generation == version.token:
+            return None
+        shared = snapshot.attach(directory, generation)
+        if shared is None:
+            return None
+        # Les changements publiés ne valent que depuis la génération utilisée ici
+        changes = shared['changes']
+        if changes is None or version.token is None or changes['previous'] != version.token:
+            changed, temperatures_changed = None, True
+        else:
+            changed, temperatures_changed = changes['storms'], changes['temperatures']
+        return _swap(shared['frames']['tracks'], shared['frames']['temperatures'], changed,
+                     temperatures_changed, token=generation, derived=_derived(shared))
+
+
+def publish(directory=None):
+    """Publish the data in use as the snapshot that the worker processes of a server
+    attach to (see core.snapshot), with the storms changed since the generation it was
+    refreshed from, then switch to the mapped copy. The starting points and the values
+    of the named Derived of the imported modules are published with it, computed here
+    once. Returns the new generation."""
+    with _reload_lock:
+        version = _latest()
+        changes = None
+        if version.changes is not None and version.base is not None:
+            changes = {'previous': version.base, 'storms': version.changes['storms'].tolist(),
+                       'temperatures': version.changes['temperatures']}
+        frames = {'tracks': version.tracks, 'temperatures': version.temperatures, 'starts': version.starts}
+        with pinned(version):
+            frames.update({name: derived.get() for name, derived in _published.items()})
+        generation = snapshot.publish(frames, directory, changes)
+        shared = snapshot.attach(directory, generation)
+        # Mêmes données: rien à recalculer, mais ce processus ne garde plus sa propre copie
+        _swap(shared['frames']['tracks'], shared['frames']['temperatures'], (), False, token=generation,
+              derived=_derived(shared))
+    return generation
+
+
+# True once the data is loaded (before that, there is nothing to refresh).
+def loaded():
+    return _current is not None
+
+
+# Every track row of every basin since 1950, typed once per process (or shared, see publish).
+def tracks():
+    return current().tracks.copy(deep=False)
+
+
+# Codes of the basins of the data in use, e.g. ('AL', 'EP').
+def available_basins():
+    return current().basin_names
+
+
+# True once every basin is read and indexed (always, for shared or refreshed data).
+def indexed():
+    return current().complete
+
+
+# Track rows of one of those basins. Until something needs every basin (tracks, the storm
+# index...), only this basin is read.
+def basin_tracks(basin):
+    return current().basin(basin).copy(deep=False)
+
+
+# Size of the loaded data (zeros until the first view loads it), for monitoring.
+def stats():
+    return dict(_stats)
+
+
+# Starting point (first record) of every storm, with its precomputed 'hover' text and
+# numeric 'storm_code'.
+def starts():
+    return current().starts.copy(deep=False)
+
+
+# Global land temperatures since 1950, with a 'year' column.
+def temperatures():
+    return current().temperatures.copy(deep=False)
+
+
+def year_bounds():
+    version = current()
+    return int(version.storm_years[0]), int(version.storm_years[-1])
+
+
+# Genesis year of every storm and the row offsets of each storm in tracks(), read-only.
+def storm_index():
+    version = current()
+    years = version.storm_years.view()
+    offsets = version.storm_offsets.view()
+    years.flags.writeable = False
+    offsets.flags.writeable = False
+    return years, offsets
+
+
+def _storm_range(version, first_year, last_year):
+    first = np.searchsorted(version.storm_years, first_year, side='left')
+    stop = np.searchsorted(version.storm_years, last_year, side='right')
+    return int(first), int(max(first, stop))
+
+
+# Positions [first, stop) of the storms that started between first_year and last_year
+# (inclusive). Storms are sorted by genesis, so this is two binary searches.
+def storm_range(first_year, last_year):
+    return _storm_range(current(), first_year, last_year)
+
+
+# Rows in tracks() of the storms at these positions, end to end, and the bounds of each
+# storm in that selection (like the offsets of storm_index()).
+def rows_of(positions):
+    return _rows_at(current().storm_offsets, positions)
+
+
+# Content hash of the storms at these positions (their points, in order): it changes
+# whenever any value of any of their points does.
+def storm_hashes(positions):
+    version = current()
+    rows, bounds = _rows_at(version.storm_offsets, positions)
+    return _block_hashes(version.tracks.take(rows), bounds)
+
+
+# Position of one storm in the genesis-sorted index (and in starts()), or None.
+def storm_position(key):
+    return current().storm_positions.get(str(key).strip())
+
+
+# Every point of one storm, in time order, as a view (None for an unknown key).
+def storm_track(key):
+    version = current()
+    position = version.storm_positions.get(str(key).strip())
+    if position is None:
+        return None
+    return version.tracks.iloc[version.storm_offsets[position]:version.storm_offsets[position + 1]]
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+from core import startup, store
+
+# shapely et geopandas ne sont importés qu'au premier résumé en mode rapide
+landfall = startup.module('core.landfall')
+
+EARTH_RADIUS_KM = 6371.0
+
+
+# Distance in km between consecutive points (lat/lon in degrees), element-wise.
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(a, dtype='float64')) for a in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+# Résumé des ouragans de `starts`, dont les points sont les lignes offsets[i]:offsets[i + 1] de `tracks`
+def _summarize(tracks, starts, offsets):
+    firsts, lasts = offsets[:-1], offsets[1:] - 1
+
+    # Segment i -> i + 1 de chaque ouragan; le dernier point d'un ouragan n'a pas de segment
+    lat = tracks['Lat'].to_numpy()
+    lon = tracks['Lon'].to_numpy()
+    times = tracks['DateTime'].to_numpy()
+    has_next = np.ones(len(tracks), dtype=bool)
+    has_next[lasts] = False
+    segment_km = np.zeros(len(tracks))
+    segment_km[:-1] = haversine_km(lat[:-1], lon[:-1], lat[1:], lon[1:])
+    segment_km[~has_next] = 0
+    segment_hours = np.zeros(len(tracks))
+    segment_hours[:-1] = (times[1:] - times[:-1]) / np.timedelta64(1, 'h')
+    segment_hours[~has_next] = 0
+    # Un point HU couvre l'intervalle jusqu'au point suivant (comme figures.hurricane_intervals)
+    is_hu = (tracks['Status'] == 'HU').to_numpy()
+    is_landfall = (tracks['Record'] == 'L').to_numpy()
+
+    return pd.DataFrame({
+        'Key': starts['Key'],
+        'storm_code': starts['storm_code'],
+        'basin': starts['basin'],
+        'Name': starts['Name'],
+        'year': starts['year'],
+        'start_time': times[firsts],
+        'end_time': times[lasts],
+        'genesis_lat': lat[firsts],
+        'genesis_lon': lon[firsts],
+        'lysis_lat': lat[lasts],
+        'lysis_lon': lon[lasts],
+        # fmax/fmin ignorent les valeurs manquantes (NaN) de la pression
+        'peak_wind': np.fmax.reduceat(tracks['Wind'].to_numpy(), firsts),
+        'peak_wind_kmh': np.fmax.reduceat(tracks['Wind_kmh'].to_numpy(), firsts),
+        'min_pressure': np.fmin.reduceat(tracks['Pressure'].to_numpy(), firsts),
+        'hu_hours': np.add.reduceat(np.where(is_hu, segment_hours, 0), firsts).astype('float32'),
+        'recorded_landfalls': np.add.reduceat(is_landfall.astype('int32'), firsts).astype('int16'),
+        'detected_landfalls': _detected_landfalls(starts['storm_code'].to_numpy()),
+        'track_km': np.add.reduceat(segment_km, firsts).astype('float32'),
+    }).assign(landfall=lambda df: df['recorded_landfalls'] > 0)
+
+
+# Traversées de côte de chaque ouragan détectées par core.landfall; NaN sans shapely ni
+# world.shp, pour ne pas les confondre avec une absence de landfall
+def _detected_landfalls(codes):
+    if not landfall.available():
+        return np.full(len(codes), np.nan, dtype='float32')
+    counts = landfall.landfalls()['storm_code'].value_counts()
+    return counts.reindex(codes, fill_value=0).to_numpy().astype('float32')
+
+
+@startup.timed
+def _build_storms():
+    _, offsets = store.storm_index()
+    return _summarize(store.tracks(), store.starts(), offsets)
+
+
+# Après un refresh, seuls les ouragans modifiés sont résumés à nouveau; les autres lignes
+# sont reprises du résumé précédent, dans le nouvel ordre de l'index
+@startup.timed
+def _update_storms(previous, changes):
+    if not len(changes['storms']):
+        return previous
+    starts = store.starts()
+    codes = starts['storm_code'].to_numpy()
+    changed = np.flatnonzero(np.isin(codes, changes['storms']))
+    rows, offsets = store.rows_of(changed)
+    fresh = _summarize(store.tracks().take(rows).reset_index(drop=True), starts.take(changed).reset_index(drop=True), offsets)
+    old = pd.Index(previous['storm_code']).get_indexer(codes)
+    columns = {}
+    for column in previous.columns:
+        if column in ('Key', 'storm_code', 'basin', 'Name', 'year'):
+            columns[column] = starts[column]
+            continue
+        values = previous[column].to_numpy()[np.maximum(old, 0)]
+        values[changed] = fresh[column].to_numpy()
+        columns[column] = values
+    return pd.DataFrame(columns)
+
+
+# Publié avec le snapshot: les workers d'un serveur mappent le résumé (voir store.publish)
+_storms = store.Derived(_build_storms, _update_storms, name='summary')
+
+
+# One row per storm, in the genesis order of store.starts(): genesis/lysis position and
+# time, peak wind (kt and km/h), minimum pressure, hours at HU status, number of landfall
+# records ('L') with a 'landfall' flag, number of coast crossings found by core.landfall
+# (NaN when it is unavailable) and track length in km.
+def storms():
+    return _storms.get().copy(deep=False)
+
+
+# Summary of one storm as a Series, or None for an unknown key.
+def storm(key):
+    with store.pinned():
+        position = store.storm_position(key)
+        if position is None:
+            return None
+        return _storms.get().iloc[position]
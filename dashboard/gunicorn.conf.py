@@ -0,0 +1,38 @@
+# Serveur à plusieurs workers, depuis la racine du dépôt:
+#     gunicorn -c dashboard/gunicorn.conf.py
+# Un processus à part lit les données une fois et les publie en snapshot (core.snapshot);
+# chaque worker mappe ce snapshot au lieu de charger sa propre copie des CSVs. Ce même
+# processus surveille ensuite les CSVs et publie chaque changement (core.refresh), que
+# les workers reprennent sans redémarrer.
+import os
+import subprocess
+import sys
+
+DASHBOARD_DIR = os.path.dirname(os.path.abspath(__file__))
+
+chdir = DASHBOARD_DIR
+wsgi_app = 'app:server'
+bind = os.environ.get('HURRICANE_BIND', '127.0.0.1:8050')
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+
+_publisher = None
+
+
+def on_starting(server):
+    global _publisher
+    # Les workers héritent de la variable. Le processus de publication lit les CSVs: il ne
+    # doit pas la voir, sinon il mapperait le snapshot précédent au lieu des sources.
+    directory = os.environ.setdefault(
+        'HURRICANE_SNAPSHOT_DIR', os.path.join(DASHBOARD_DIR, os.pardir, 'data', '.cache', 'snapshot'))
+    env = {name: value for name, value in os.environ.items() if name != 'HURRICANE_SNAPSHOT_DIR'}
+    _publisher = subprocess.Popen([sys.executable, '-c', f'from core import refresh; refresh.publisher({directory!r})'],
+                                  cwd=DASHBOARD_DIR, env=env, stdout=subprocess.PIPE, text=True)
+    # Les workers ne démarrent qu'une fois la première génération publiée
+    if not _publisher.stdout.readline():
+        raise RuntimeError('the data could not be published, see the error above')
+    _publisher.stdout.close()
+
+
+def on_exit(server):
+    if _publisher is not None:
+        _publisher.terminate()
@@ -1,49 +1,77 @@
+import json
+import os
+import threading
+
 from dash import dcc
 from dash import html
 from dash.dependencies import Input, Output
-import plotly.express as px
 import plotly.graph_objects as go
+from plotly.io.json import to_json_plotly
 from plotly.subplots import make_subplots
-import pandas as pd
-import numpy as np
 import dash
+import numpy as np
+
+from core import figure_cache, metrics, startup
 
-df_AL = pd.read_csv('data/AL.csv')
-df_EP = pd.read_csv('data/EP.csv')
-df_global = pd.read_csv('data/GlobalTemperatures.csv')
+# Modules de données (pandas): importés au premier usage en démarrage rapide
+aggregates, stats, store = startup.modules('core.aggregates', 'core.stats', 'core.store')
 
-df_AL['DateTime'] = pd.to_datetime(df_AL['DateTime'])
-df_EP['DateTime'] = pd.to_datetime(df_EP['DateTime'])
-df_global['dt'] = pd.to_datetime(df_global['dt'])
+dash.register_page(__name__, path='/graphs')
 
-df_AL['year'] = df_AL['DateTime'].dt.year
-df_EP['year'] = df_EP['DateTime'].dt.year
+# Nombre maximal de graphiques par ligne dans la comparaison des bassins
+BASIN_COLUMNS = 3
 
-df_AL = df_AL[df_AL['DateTime'].dt.year >= 1950]
-df_EP = df_EP[df_EP['DateTime'].dt.year >= 1950]
-df_global = df_global[df_global['dt'].dt.year >= 1950]
+# Aucune figure de cette page ne dépend d'une entrée: par défaut chacune est calculée une
+# seule fois par processus et intégrée au layout, sans callback. HURRICANE_STATIC_GRAPHS=0
+# revient à un callback (mémoïsé) par graphique.
+STATIC = os.environ.get('HURRICANE_STATIC_GRAPHS', '1') != '0'
 
-df_AL = df_AL.reset_index(drop=True)
-df_EP = df_EP.reset_index(drop=True)
-df_global = df_global.reset_index(drop=True)
+# id du graphique -> fonction qui construit sa figure
+FIGURES = {}
 
-df = pd.concat([df_AL, df_EP])
+_lock = threading.Lock()
+# Figures déjà sérialisées puis relues en dicts, par version des données (génération du
+# store -> id -> figure): le layout les renvoie telles quelles
+_static = {}
 
-df = df.reset_index(drop=True)
 
-df['year'] = df['DateTime'].dt.year
+def figure_callback(graph_id):
+    """Register the figure of `graph_id`; it is a Dash callback only when STATIC is off."""
+    def decorator(func):
+        FIGURES[graph_id] = func
+        if STATIC:
+            return func
+        return dash.callback(
+            Output(graph_id, 'figure'),
+            Input(graph_id, 'id'))(metrics.instrument(figure_cache.memoize()(func)))
+    return decorator
 
-def knots_to_kmh(knots):
-    return knots * 1.852
 
-dash.register_page(__name__, path='/graphs')
+def static_figure(graph_id):
+    with store.pinned() as version:
+        figures = _static.get(version.generation, {})
+        if graph_id not in figures:
+            with _lock:
+                figures = _static.setdefault(version.generation, {})
+                if graph_id not in figures:
+                    with startup.span(f'{__name__}.{graph_id}'):
+                        figures[graph_id] = json.loads(to_json_plotly(FIGURES[graph_id](graph_id)))
+                for generation in sorted(_static)[:-store.KEEP_VERSIONS]:
+                    del _static[generation]
+    return figures[graph_id]
+
+
+def graph(graph_id):
+    if STATIC:
+        return dcc.Graph(id=graph_id, figure=static_figure(graph_id))
+    return dcc.Graph(id=graph_id)
+
 
 # Callback to update the 'cases-by-year-bar' graph
-@dash.callback(
-    Output('cases-by-year-bar', 'figure'),
-    Input('cases-by-year-bar', 'id'))
+@figure_callback('cases-by-year-bar')
 def update_cases_by_year_bar(id):
-    count = df.groupby('year').size().reset_index(name='count')
+    with metrics.phase('filter'):
+        count = aggregates.yearly()
 
     fig = go.Figure()
     fig.add_trace(go.Bar(x=count['year'], y=count['count'], name='Number of cases by year'))
@@ -55,8 +83,7 @@ def update_cases_by_year_bar(id):
     )
 
     # Add rolling mean
-    count['rolling_mean'] = count['count'].rolling(window=10).mean()
-    fig.add_trace(go.Scatter(x=count['year'], y=count['rolling_mean'], mode='lines', name='Rolling mean of cases (10 years window)'))
+    fig.add_trace(go.Scatter(x=count['year'], y=count['count_rolling'], mode='lines', name='Rolling mean of cases (10 years window)'))
     fig.update_layout(legend=dict(x=0.05, y=-1.25, orientation='h'))
 
     # Time series range slider
@@ -64,27 +91,23 @@ def update_cases_by_year_bar(id):
     return fig
 
 # Callback to update the 'wind-speed-by-year' graph
-@dash.callback(
-    Output('wind-speed-by-year', 'figure'),
-    Input('wind-speed-by-year', 'id'))
+@figure_callback('wind-speed-by-year')
 def update_wind_speed_by_year(id):
+    with metrics.phase('filter'):
+        wind = aggregates.yearly()
+
     fig = go.Figure()
     # Maximum wind speed by year
-    df['Wind_kmh'] = knots_to_kmh(df['Wind'])
-    df_grouped_by_year_wind = df.groupby('year')['Wind_kmh'].max().reset_index(name='max_wind')
-    fig.add_trace(go.Scatter(x=df_grouped_by_year_wind['year'], y=df_grouped_by_year_wind['max_wind'], mode='lines', name='Max wind speed by year', line=dict(color='blue')))
+    fig.add_trace(go.Scatter(x=wind['year'], y=wind['max_wind'], mode='lines', name='Max wind speed by year', line=dict(color='blue')))
 
     # Minimum wind speed by year
-    df_grouped_by_year_wind_min = df.groupby('year')['Wind_kmh'].min().reset_index(name='min_wind')
-    fig.add_trace(go.Scatter(x=df_grouped_by_year_wind_min['year'], y=df_grouped_by_year_wind_min['min_wind'], mode='lines', name='Min wind speed by year', line=dict(color='green')))
+    fig.add_trace(go.Scatter(x=wind['year'], y=wind['min_wind'], mode='lines', name='Min wind speed by year', line=dict(color='green')))
 
     # Rolling mean max
-    df_grouped_by_year_wind['rolling_mean'] = df_grouped_by_year_wind['max_wind'].rolling(window=10).mean()
-    fig.add_trace(go.Scatter(x=df_grouped_by_year_wind['year'], y=df_grouped_by_year_wind['rolling_mean'], mode='lines', name='Rolling mean of max wind speed (10 years window)', line=dict(color='red')))
+    fig.add_trace(go.Scatter(x=wind['year'], y=wind['max_wind_rolling'], mode='lines', name='Rolling mean of max wind speed (10 years window)', line=dict(color='red')))
 
     # Rolling mean min
-    df_grouped_by_year_wind_min['rolling_mean_min'] = df_grouped_by_year_wind_min['min_wind'].rolling(window=10).mean()
-    fig.add_trace(go.Scatter(x=df_grouped_by_year_wind_min['year'], y=df_grouped_by_year_wind_min['rolling_mean_min'], mode='lines', name='Rolling mean of min wind speed (10 years window)', line=dict(color='orange')))
+    fig.add_trace(go.Scatter(x=wind['year'], y=wind['min_wind_rolling'], mode='lines', name='Rolling mean of min wind speed (10 years window)', line=dict(color='orange')))
 
     fig.update_layout(
         legend=dict(x=0, y=-1.25, orientation='h'),
@@ -98,32 +121,24 @@ def update_wind_speed_by_year(id):
     return fig
 
 # Callback to update the 'correlation-graph' graph
-@dash.callback(
-    Output('correlation-graph', 'figure'),
-    Input('correlation-graph', 'id'))
-
+@figure_callback('correlation-graph')
 def update_correlation_graph(id):
-
-    df_global['year'] = pd.to_datetime(df_global['dt']).dt.year
-
-    df_global_grouped = df_global.groupby('year')['LandAverageTemperature'].mean().reset_index(name='mean_temp')
-    df_global_grouped['rolling_mean_temp'] = df_global_grouped['mean_temp'].rolling(window=10).mean()
-
-    count = df.groupby('year').size().reset_index(name='count')
-    count['rolling_mean'] = count['count'].rolling(window=10).mean()
+    with metrics.phase('filter'):
+        temperature = aggregates.temperature_by_year()
+        count = aggregates.yearly()
 
     fig = go.Figure()
 
-    fig.add_trace(go.Scatter(x=df_global_grouped['year'], y=df_global_grouped['rolling_mean_temp'], mode='lines', name='Trend of temperature',))
+    fig.add_trace(go.Scatter(x=temperature['year'], y=temperature['mean_temp_rolling'], mode='lines', name='Trend of temperature',))
 
-    fig.add_trace(go.Scatter(x=count['year'], y=count['rolling_mean'], mode='lines', name='Trend of cases', yaxis='y2', line=dict(color='red')))
+    fig.add_trace(go.Scatter(x=count['year'], y=count['count_rolling'], mode='lines', name='Trend of cases', yaxis='y2', line=dict(color='red')))
 
     fig.update_layout(
         title='Correlation of the Trend Temperature and Trend of Cases by Year',
         xaxis=dict(title='Year'),
         yaxis=dict(
             title='Temperature (°C)',
-            range=[df_global_grouped['mean_temp'].min(), df_global_grouped['mean_temp'].max()]
+            range=[temperature['mean_temp'].min(), temperature['mean_temp'].max()]
         ),
         yaxis2=dict(
             title='Number of Cases',
@@ -138,49 +153,53 @@ def update_correlation_graph(id):
     fig.update_xaxes(range=[1959, count['year'].max()])
     return fig
 
-# Callback to update the 'cases-by-year-al-ep' graph
-@dash.callback(
-    Output('cases-by-year-al-ep', 'figure'),
-    Input('cases-by-year-al-ep', 'id'))
-def update_cases_by_year_al_ep(id):
-    count_AL = df_AL.groupby('year').size().reset_index(name='count')
-    count_EP = df_EP.groupby('year').size().reset_index(name='count')
-
-    fig = make_subplots(rows=1, cols=2, subplot_titles=('Number of cases by year in AL', 'Number of cases by year in EP'))
+# Liste lisible des bassins: 'AL', 'AL and EP', 'AL, EP and WP'
+def basin_names(basins):
+    return ' and '.join([', '.join(basins[:-1]), basins[-1]] if len(basins) > 1 else basins)
 
-    fig.add_trace(go.Bar(x=count_AL['year'], y=count_AL['count'], name='Number of cases by year in AL'), row=1, col=1)
-    count_AL['rolling_mean'] = count_AL['count'].rolling(window=10).mean()
-    fig.add_trace(go.Scatter(x=count_AL['year'], y=count_AL['rolling_mean'], mode='lines', name='Trend of cases in AL'), row=1, col=1)
 
-    fig.add_trace(go.Bar(x=count_EP['year'], y=count_EP['count'], name='Number of cases by year in EP'), row=1, col=2)
-    count_EP['rolling_mean'] = count_EP['count'].rolling(window=10).mean()
-    fig.add_trace(go.Scatter(x=count_EP['year'], y=count_EP['rolling_mean'], mode='lines', name='Trend of cases in EP'), row=1, col=2)
+# Callback to update the 'cases-by-year-al-ep' graph: one subplot per basin found in data/
+@figure_callback('cases-by-year-al-ep')
+def update_cases_by_year_al_ep(id):
+    with metrics.phase('filter'):
+        count = aggregates.yearly_by_basin()
+        basins = aggregates.basins()
+    # Aucun bassin (dossier data/ vide): pas de grille de sous-graphiques à construire
+    if not basins:
+        fig = go.Figure()
+        fig.update_layout(title_text='Number of cases by year', xaxis_title='Year',
+                          yaxis_title='Number of cases', height=450)
+        return fig
+    cols = min(len(basins), BASIN_COLUMNS)
+    rows = -(-len(basins) // cols)
+
+    fig = make_subplots(rows=rows, cols=cols, subplot_titles=[f'Number of cases by year in {basin}' for basin in basins])
+
+    for i, (basin, count_basin) in enumerate(count.groupby('basin', sort=False)):
+        row, col = i // cols + 1, i % cols + 1
+        fig.add_trace(go.Bar(x=count_basin['year'], y=count_basin['count'], name=f'Number of cases by year in {basin}'), row=row, col=col)
+        fig.add_trace(go.Scatter(x=count_basin['year'], y=count_basin['count_rolling'], mode='lines', name=f'Trend of cases in {basin}'), row=row, col=col)
 
     fig.update_layout(
-        title_text='Number of cases by year in AL and EP',
+        title_text=f'Number of cases by year in {basin_names(basins)}',
         xaxis_title='Year',
         yaxis_title='Number of cases',
         legend=dict(x=0, y=-0.25, orientation='h'),
-        height=450  # Hauteur fixe
+        height=450 * rows  # Hauteur fixe par ligne de graphiques
     )
     return fig
 
 # Callback to update the 'trends-graph' graph
-@dash.callback(
-    Output('trends-graph', 'figure'),
-    Input('trends-graph', 'id'))
+@figure_callback('trends-graph')
 def update_trends_graph(id):
-    count = df.groupby('year').size().reset_index(name='count')
-    count['rolling_mean'] = count['count'].rolling(window=10).mean()
-    count_AL = df_AL.groupby('year').size().reset_index(name='count')
-    count_AL['rolling_mean'] = count_AL['count'].rolling(window=10).mean()
-    count_EP = df_EP.groupby('year').size().reset_index(name='count')
-    count_EP['rolling_mean'] = count_EP['count'].rolling(window=10).mean()
+    with metrics.phase('filter'):
+        count = aggregates.yearly()
+        count_by_basin = aggregates.yearly_by_basin()
 
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=count['year'], y=count['rolling_mean'], mode='lines', name='Trend of cases'))
-    fig.add_trace(go.Scatter(x=count_AL['year'], y=count_AL['rolling_mean'], mode='lines', name='Trend of cases in AL'))
-    fig.add_trace(go.Scatter(x=count_EP['year'], y=count_EP['rolling_mean'], mode='lines', name='Trend of cases in EP'))
+    fig.add_trace(go.Scatter(x=count['year'], y=count['count_rolling'], mode='lines', name='Trend of cases'))
+    for basin, count_basin in count_by_basin.groupby('basin', sort=False):
+        fig.add_trace(go.Scatter(x=count_basin['year'], y=count_basin['count_rolling'], mode='lines', name=f'Trend of cases in {basin}'))
     fig.update_layout(
         title='Trends of cases by year',
         xaxis_title='Year',
@@ -193,19 +212,25 @@ def update_trends_graph(id):
     return fig
 
 # Callback to update the 'correlation-temp-hurricane-scatter' graph
-@dash.callback(
-    Output('correlation-temp-hurricane-scatter', 'figure'),
-    Input('correlation-temp-hurricane-scatter', 'id'))
+@figure_callback('correlation-temp-hurricane-scatter')
 def update_correlation_temp_hurricane_scatter(id):
-    df_global['year'] = pd.to_datetime(df_global['dt']).dt.year
-    df_global_grouped = df_global.groupby('year')['LandAverageTemperature'].mean().reset_index(name='mean_temp')
-    count = df.groupby('year').size().reset_index(name='count')
-    df_corr = pd.merge(df_global_grouped, count, on='year')
-
-    fig = px.scatter(df_corr, x='mean_temp', y='count', 
-                     title='Correlation between temperature and number of hurricanes (trend)',
-                     trendline="ols", trendline_color_override="red")
+    with metrics.phase('filter'):
+        trend = stats.temperature_trend()
+    points, fit, line = trend['points'], trend['fit'], trend['line']
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=points['mean_temp'], y=points['count'], mode='markers', showlegend=False,
+                             hovertemplate='mean_temp=%{x}<br>count=%{y}<extra></extra>'))
+    # Intervalle de confiance à 95 % de la droite, puis la droite OLS
+    fig.add_trace(go.Scatter(x=np.r_[line['x'], line['x'][::-1]], y=np.r_[line['upper'], line['lower'][::-1]],
+                             fill='toself', fillcolor='rgba(255, 0, 0, 0.15)', line=dict(width=0),
+                             hoverinfo='skip', showlegend=False))
+    fig.add_trace(go.Scatter(x=line['x'], y=line['y'], mode='lines', line=dict(color='red'), showlegend=False,
+                             hovertemplate=f"<b>OLS trendline</b><br>count = {fit['slope']:g} * mean_temp + {fit['intercept']:g}"
+                                           f"<br>R<sup>2</sup>={fit['r2']:g}<br><br>mean_temp=%{{x}}<br>count=%{{y}} <b>(trend)</b><extra></extra>"))
     fig.update_layout(
+        title=dict(text='Correlation between temperature and number of hurricanes (trend)'
+                        f"<br><sup>Pearson r = {trend['pearson']:.2f}, Spearman ρ = {trend['spearman']:.2f}, n = {fit['n']} years</sup>"),
         xaxis_title='Tempurature (°C)',
         yaxis_title='Number of hurrican',
         height=450
@@ -213,21 +238,16 @@ def update_correlation_temp_hurricane_scatter(id):
     return fig
 
 # Callback to update the 'correlation-temp-hurricane-line' graph
-@dash.callback(
-    Output('correlation-temp-hurricane-line', 'figure'),
-    Input('correlation-temp-hurricane-line', 'id'))
+@figure_callback('correlation-temp-hurricane-line')
 def update_correlation_temp_hurricane_line(id):
-    df_global['year'] = pd.to_datetime(df_global['dt']).dt.year
-    df_global_grouped = df_global.groupby('year')['LandAverageTemperature'].mean().reset_index(name='mean_temp')
-    df_global_grouped['rolling_mean_temp'] = df_global_grouped['mean_temp'].rolling(window=10).mean()
-
-    count = df.groupby('year').size().reset_index(name='count')
-    count['rolling_mean_count'] = count['count'].rolling(window=10).mean()
+    with metrics.phase('filter'):
+        temperature = aggregates.temperature_by_year()
+        count = aggregates.yearly()
 
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=df_global_grouped['year'], y=df_global_grouped['rolling_mean_temp'],
+    fig.add_trace(go.Scatter(x=temperature['year'], y=temperature['mean_temp_rolling'],
                              mode='lines', name='Temperature mean (trend)'))
-    fig.add_trace(go.Scatter(x=count['year'], y=count['rolling_mean_count'],
+    fig.add_trace(go.Scatter(x=count['year'], y=count['count_rolling'],
                              mode='lines', name='Number of hurrican (trend)', yaxis='y2'))
 
     fig.update_layout(
@@ -243,67 +263,74 @@ def update_correlation_temp_hurricane_line(id):
     return fig
 
 
-# Layout of the app
-layout = html.Div(children=[
-    html.H3(children="Number of case / Wind speeds", className='text-center mt-3'),
+# Layout of the app (a function: the static figures are built by the first call)
+def layout(**kwargs):
+    return html.Div(children=[
+        html.H3(children="Number of case / Wind speeds", className='text-center mt-3'),
 
-    # Première ligne avec deux graphiques
-    html.Div(children=[
-        # Premier graphique
-        dcc.Graph(id='cases-by-year-bar'),
+        # Première ligne avec deux graphiques
+        html.Div(children=[
+            # Premier graphique
+            graph('cases-by-year-bar'),
 
-        # Deuxième graphique
-        dcc.Graph(id='wind-speed-by-year'),
-    ], style={'display': 'flex', 'width': '100%', 'margin-top': '20px'}),
+            # Deuxième graphique
+            graph('wind-speed-by-year'),
+        ], style={'display': 'flex', 'width': '100%', 'margin-top': '20px'}),
 
 
-    html.Div(className='separator'),
+        html.Div(className='separator'),
 
-    # Section 2: Corrélation
-    html.Div(children=[
-        html.H3(children="Correlation Temperature / Number of Hurricanes", className='text-center mt-3'),
+        # Section 2: Corrélation
         html.Div(children=[
-            # Premier graphique de corrélation (nuage de points)
-            html.Div([
-                dcc.Graph(id='correlation-temp-hurricane-scatter'),
-            ], style={'width': '50%', 'display': 'inline-block'}),
-
-            # Deuxième graphique de corrélation (lignes)
-            html.Div([
-                dcc.Graph(id='correlation-temp-hurricane-line'),
-            ], style={'width': '50%', 'display': 'inline-block'}),
-        ], style={'width': '100%'}),
-    ]),
-
-    html.Div(className='separator'),
-
-    # Section 3: Comparaison AL et EP
-    html.Div(children=[
-        html.H3(children="Comparaison AL and EP", className='text-center mt-3'),
-        html.Div(children=[
-            dcc.Graph(id='cases-by-year-al-ep'),
-        ], style={'width': '100%'}),
-    ]),
+            html.H3(children="Correlation Temperature / Number of Hurricanes", className='text-center mt-3'),
+            html.Div(children=[
+                # Premier graphique de corrélation (nuage de points)
+                html.Div([
+                    graph('correlation-temp-hurricane-scatter'),
+                ], style={'width': '50%', 'display': 'inline-block'}),
+
+                # Deuxième graphique de corrélation (lignes)
+                html.Div([
+                    graph('correlation-temp-hurricane-line'),
+                ], style={'width': '50%', 'display': 'inline-block'}),
+            ], style={'width': '100%'}),
+        ]),
 
-    html.Div(className='separator'),
+        html.Div(className='separator'),
 
-    # Section 4: Tendances
-    html.H3(children="Trends", className='text-center mt-3'),
-    html.Div(children=[
+        # Section 3: Comparaison des bassins
         html.Div(children=[
-            dcc.Graph(id='trends-graph'),
-        ], style={'width': '100%'}),
-    ]),
+            html.H3(children="Comparaison of basins", className='text-center mt-3'),
+            html.Div(children=[
+                graph('cases-by-year-al-ep'),
+            ], style={'width': '100%'}),
+        ]),
 
-    # Footer
-    html.Footer(className='home-footer', children=[
         html.Div(className='separator'),
-        html.Div(className='container', children=[
-            html.P('© 2024 - HES-SO Master. All rights reserved.', className='text-center'),
-            html.Div(className='text-center', children=[
-                html.Img(src='/assets/images/HES_SO_Logo.png', className='hesso-logo-footer'),
+
+        # Section 4: Tendances
+        html.H3(children="Trends", className='text-center mt-3'),
+        html.Div(children=[
+            html.Div(children=[
+                graph('trends-graph'),
+            ], style={'width': '100%'}),
+        ]),
+
+        # Footer
+        html.Footer(className='home-footer', children=[
+            html.Div(className='separator'),
+            html.Div(className='container', children=[
+                html.P('© 2024 - HES-SO Master. All rights reserved.', className='text-center'),
+                html.Div(className='text-center', children=[
+                    html.Img(src='/assets/images/HES_SO_Logo.png', className='hesso-logo-footer'),
+                ]),
+                html.P('MA-VI Project - Telley Cyril / Saucy Quentin / Altin Hajda', className='text-center'),
             ]),
-            html.P('MA-VI Project - Telley Cyril / Saucy Quentin / Altin Hajda', className='text-center'),
         ]),
-    ]),
-])
\ No newline at end of file
+    ])
+
+
+# Build the static figures ahead of the first visit.
+def warm():
+    if STATIC:
+        layout()
@@ -1,111 +1,261 @@
+import threading
+
 import dash
 from dash import dcc
 from dash import html
-from dash.dependencies import Input, Output, State
-import pandas as pd
+from dash.dependencies import ClientsideFunction, Input, Output, State
+import numpy as np
 import plotly.graph_objects as go
-import plotly.express as px
+
+from core import figure_cache, metrics, startup
+
+# Modules de données (pandas, shapely...): importés au premier usage en démarrage rapide
+density, figures, lod, spatial, store, summary = startup.modules(
+    'core.density', 'core.figures', 'core.lod', 'core.spatial', 'core.store', 'core.summary')
 
 dash.register_page(__name__, path='/maps')
 
-# Fusion des DataFrames
-dfDevastatorAt = pd.read_csv("data/AL.csv")
-dfDevastatorEP = pd.read_csv("data/EP.csv")
-df = pd.concat([dfDevastatorAt, dfDevastatorEP])
-df['DateTime'] = pd.to_datetime(df['DateTime'], errors='coerce').dt.tz_localize(None)
-df = df[df['DateTime'] >= '1950-01-01']
-
-df['Wind_kmh'] = df['Wind'] * 1.852
-
-# Points de départ des ouragans
-set_df = df.drop_duplicates(subset='Key')
-
-# Création de la carte initiale
-fig = go.Figure()
-
-fig.add_trace(go.Scattermapbox(
-    mode='markers',
-    lon=set_df['Lon'],
-    lat=set_df['Lat'],
-    marker=dict(size=8, color='blue'),
-    text=(
-            'Name: ' + set_df['Name'] + '<br>' +
-            'Key: ' + set_df['Key'] + '<br>' +
-            'DateTime: ' + set_df['DateTime'].dt.strftime('%Y-%m-%d %H:%M:%S') + '<br>' +
-            'Wind: ' + set_df['Wind'].astype(str) + '<br>' +
-            'Pressure: ' + set_df['Pressure'].astype(str)
-    ),
-    hoverinfo='text',
-    customdata=set_df[['Key', 'DateTime', 'Wind', 'Pressure']].values,
-))
-
-fig.update_layout(
-    title='Hurricane Starting Points',
-    mapbox_style='carto-positron',
-    mapbox=dict(center={'lat': 20, 'lon': -60}, zoom=3),
-    height=700
-)
+# Données de clic compactes: identifiant numérique de l'ouragan, vent, pression
+def hover_customdata(starts):
+    return starts[['storm_code', 'Wind', 'Pressure']].to_numpy(dtype='float64')
 
-begin_date = set_df['DateTime'].dt.year.iloc[0]
-end_date = set_df['DateTime'].dt.year.iloc[-1]
-
-# Création du graphique de densité
-df_counts = df.groupby(['Lat', 'Lon']).size().reset_index(name='count')
-density_fig = go.Figure(
-    go.Densitymapbox(
-        lat=df_counts['Lat'],
-        lon=df_counts['Lon'],
-        z=df_counts['count'],
-        radius=15,  # Radius for density estimation
-        colorscale="Viridis",  # Color scale
-        opacity=0.7,  # Layer opacity
+
+# Trop d'ouragans pour la vue: points agrégés, taille selon le nombre d'ouragans
+def cluster_trace(clusters):
+    return go.Scattermapbox(
+        mode='markers',
+        lon=clusters['lon'],
+        lat=clusters['lat'],
+        marker=dict(size=8 + 4 * np.sqrt(clusters['count']), color='orange', opacity=0.7),
+        text=[f'{count} hurricanes' for count in clusters['count']],
+        hoverinfo='text',
+        showlegend=False
     )
-)
 
-# Update the layout to set mapbox properties
 
-density_fig.update_layout(
-    mapbox=dict(
-        style="carto-positron",  # Map style
-        center=dict(lat=20, lon=-60),  # Map center
-        zoom=3,  # Zoom level
-    ),
-    title="Map of Hurricane Densities",  # Add a title
-)
+# Traces de la carte: points de départ et clusters (BASE_TRACES), puis le chemin de
+# l'ouragan sélectionné (OVERLAY_TRACES: HU, autre statut, départ, arrivée). Le nombre de
+# traces est fixe pour que la sélection ne remplace que les traces du chemin (dash.Patch).
+BASE_TRACES = 2
+OVERLAY_TRACES = 4
+
+
+def empty_trace():
+    return go.Scattermapbox(mode='markers', lon=[], lat=[], hoverinfo='skip', showlegend=False)
+
+
+# Traces du chemin d'un ouragan, complétées par des traces vides jusqu'à OVERLAY_TRACES.
+# Départ et arrivée viennent du résumé précalculé de l'ouragan.
+def path_overlay(details, storm):
+    traces = figures.path_traces(details)
+    traces += [empty_trace() for _ in range(2 - len(traces))]
+    traces.append(go.Scattermapbox(
+        mode='markers',
+        lon=[storm['genesis_lon']],
+        lat=[storm['genesis_lat']],
+        marker=dict(size=12, color='green', symbol='circle'),
+        text='Start',
+        hoverinfo='text'
+    ))
+    traces.append(go.Scattermapbox(
+        mode='markers',
+        lon=[storm['lysis_lon']],
+        lat=[storm['lysis_lat']],
+        marker=dict(size=12, color='red', symbol='x'),
+        text='End',
+        hoverinfo='text'
+    ))
+    return traces
+
+
+def empty_overlay():
+    return [empty_trace() for _ in range(OVERLAY_TRACES)]
+
+
+_lock = threading.Lock()
+# Période complète et figures affichées à l'ouverture de la page, construites une fois
+# par version des données (génération du store -> figures)
+_initial = {}
+
+
+@startup.timed
+def _build_initial():
+    begin_date, end_date = store.year_bounds()
+
+    # Création de la carte initiale
+    initial_points, initial_clusters = lod.starting_points(begin_date, end_date)
+    fig = go.Figure()
+
+    fig.add_trace(go.Scattermapbox(
+        mode='markers',
+        lon=initial_points['Lon'],
+        lat=initial_points['Lat'],
+        marker=dict(size=8, color='blue'),
+        text=initial_points['hover'],
+        hoverinfo='text',
+        customdata=hover_customdata(initial_points),
+    ))
+    fig.add_trace(cluster_trace(initial_clusters) if initial_clusters is not None else empty_trace())
+    fig.add_traces(empty_overlay())
+
+    fig.update_layout(
+        title='Hurricane Starting Points',
+        mapbox_style='carto-positron',
+        mapbox=dict(center={'lat': 20, 'lon': -60}, zoom=3),
+        height=700,
+        showlegend=False,
+        # La vue (centre, zoom) reste celle de l'utilisateur quand le serveur renvoie la carte
+        uirevision='map',
+        meta={'lod': lod.is_active(begin_date, end_date), 'base_traces': BASE_TRACES}
+    )
+
+    # Création du graphique de densité
+    # Nombre de points par cellule de la grille, sur toute la période
+    density_lat, density_lon, density_count = density.counts_between(begin_date, end_date)
+    density_fig = go.Figure(
+        go.Densitymapbox(
+            lat=density_lat,
+            lon=density_lon,
+            z=density_count,
+            radius=15,  # Radius for density estimation
+            colorscale="Viridis",  # Color scale
+            opacity=0.7,  # Layer opacity
+        )
+    )
+
+    # Update the layout to set mapbox properties
+
+    density_fig.update_layout(
+        mapbox=dict(
+            style="carto-positron",  # Map style
+            center=dict(lat=20, lon=-60),  # Map center
+            zoom=3,  # Zoom level
+        ),
+        title="Map of Hurricane Densities",  # Add a title
+        uirevision='density',
+    )
+    # Dicts qui gardent les tableaux numpy: rapides à sérialiser à chaque visite
+    return begin_date, end_date, fig.to_plotly_json(), density_fig.to_plotly_json()
+
+
+def initial_figures():
+    with store.pinned() as version:
+        initial = _initial.get(version.generation)
+        if initial is None:
+            with _lock:
+                initial = _initial.get(version.generation)
+                if initial is None:
+                    initial = _initial[version.generation] = _build_initial()
+                    for generation in sorted(_initial)[:-store.KEEP_VERSIONS]:
+                        del _initial[generation]
+    return initial
+
+
+# Build the initial figures ahead of the first visit, and the storm summaries (with the
+# landfalls detected against the coastline) ahead of the first click on a storm.
+def warm():
+    initial_figures()
+    summary.storms()
 
-# Callback pour mettre à jour la carte en fonction de la plage de dates
-@dash.callback(
-    [Output('map', 'figure', allow_duplicate=True),  # First map output
-     Output('density-map', 'figure')],
-    [Input('date_select', 'value'),
-     Input('map', 'relayoutData')],
-    prevent_initial_call=True)
-def update_output(value, relayoutData):
-    start_date = pd.to_datetime(f"{value[0]}-01-01")
-    end_date = pd.to_datetime(f"{value[1]}-12-31")
 
+# Centre et zoom courants de la carte (valeurs par défaut avant toute interaction)
+def map_view(relayoutData):
     if relayoutData is not None and 'mapbox.center' in relayoutData:
-        map_center = relayoutData['mapbox.center']
-        map_zoom = relayoutData['mapbox.zoom']
-    else:
-        map_center = {'lat': 20, 'lon': -60}
-        map_zoom = 3
+        return relayoutData['mapbox.center'], relayoutData['mapbox.zoom']
+    return {'lat': 20, 'lon': -60}, 3
+
+
+# Partie de la vue dont dépend la carte des points de départ: le centre et le zoom, plus
+# les bornes de la vue quand les points envoyés y sont réduits (niveau de détail)
+def view_key(value, view):
+    if lod.is_active(value[0], value[1]):
+        return map_view(view), lod.viewport(view)[:4]
+    return map_view(view)
+
 
-    chosen_value = set_df[(set_df['DateTime'] >= start_date) & (set_df['DateTime'] <= end_date)]
-    chosen_value_dataset = df[(df['DateTime'] >= start_date) & (df['DateTime'] <= end_date)]
-    updated_fig = drawmap(chosen_value)
+def clicked_key(clickData):
+    if clickData is None:
+        return None
+    # Les clusters du niveau de détail n'ont pas de customdata
+    customdata = clickData['points'][0].get('customdata')
+    if not customdata:
+        return None
+    return customdata[0] if isinstance(customdata[0], str) else store.storm_key(customdata[0])
+
+
+# Carte des points de départ pour une plage de dates et la vue courante, avec le chemin
+# de l'ouragan sélectionné s'il y en a un. `selected`: ouragans traversant la zone choisie.
+def starting_points_map(value, view, details=None, selected=None):
+    # Tranche contiguë de l'index trié par année, réduite au niveau de détail de la vue
+    with metrics.phase('filter'):
+        chosen_value, clusters = lod.starting_points(value[0], value[1], view, selected)
+    metrics.rows(len(chosen_value))
+    updated_fig = drawmap(chosen_value, clusters)
+    updated_fig.add_traces(empty_overlay() if details is None else path_overlay(details, summary.storm(details['Key'].iloc[0])))
+    map_center, map_zoom = map_view(view)
     updated_fig.update_layout(
-        title=f'Hurricane Starting Points: {value[0]} to {value[1]}',
         mapbox_style='carto-positron',
         mapbox=dict(center=map_center, zoom=map_zoom),
+        showlegend=False,
+        uirevision='map',
+        meta={'lod': lod.is_active(value[0], value[1], selected), 'base_traces': BASE_TRACES}
+    )
+    return updated_fig
+
+
+# Callback pour mettre à jour la carte en fonction de la plage de dates et de la zone
+# sélectionnée (lasso ou rectangle, voir 'map-region'). Le déplacement et le zoom sont
+# gérés dans le navigateur (assets/map.js); 'map-viewport' ne change que si la carte est
+# en niveau de détail et doit être recalculée pour la nouvelle vue. Le chemin de
+# l'ouragan sélectionné est redessiné ici, puisque la figure entière est remplacée.
+@dash.callback(
+    Output('map', 'figure', allow_duplicate=True),
+    [Input('date_select', 'value'),
+     Input('map-viewport', 'data'),
+     Input('map-region', 'data')],
+    [State('map-view-state', 'data'),
+     State('map', 'clickData')],
+    prevent_initial_call=True)
+@metrics.instrument
+@figure_cache.memoize(key=lambda value, viewport, region, view, clickData: (value, region, view_key(value, view), clicked_key(clickData)))
+def update_output(value, viewport, region, view, clickData):
+    selected_key = clicked_key(clickData)
+    if selected_key is not None:
+        selected_key = str(selected_key).strip()
+    with metrics.phase('filter'):
+        hurricane_details = None if selected_key is None else store.storm_track(selected_key)
+        # Ouragans dont la trajectoire traverse la zone (index R-tree des segments)
+        selected = spatial.storms_in_region(region)
+    updated_fig = starting_points_map(value, view, hurricane_details, selected)
+    if hurricane_details is not None:
+        title = f'Hurricane Path for {selected_key}'
+    elif selected is not None:
+        title = f'Hurricane Starting Points: {value[0]} to {value[1]}, crossing the selected area'
+    else:
+        title = f'Hurricane Starting Points: {value[0]} to {value[1]}'
+    updated_fig.update_layout(
+        title=title,
         height=700
     )
-    df_counts = chosen_value_dataset.groupby(['Lat', 'Lon']).size().reset_index(name='count')
+    return updated_fig
+
+
+# Callback pour la carte de densité, qui ne dépend que de la plage de dates
+@dash.callback(
+    Output('density-map', 'figure'),
+    Input('date_select', 'value'),
+    prevent_initial_call=True)
+@metrics.instrument
+@figure_cache.memoize()
+def update_density(value):
+    with metrics.phase('filter'):
+        density_lat, density_lon, density_count = density.counts_between(value[0], value[1])
+    metrics.rows(len(density_count))
     density_fig = go.Figure(
         go.Densitymapbox(
-            lat=df_counts['Lat'],
-            lon=df_counts['Lon'],
-            z=df_counts['count'],
+            lat=density_lat,
+            lon=density_lon,
+            z=density_count,
             radius=15,
             colorscale="Viridis",
             opacity=0.7,
@@ -119,75 +269,41 @@ def update_output(value, relayoutData):
         ),
         title="Map of Hurricane Densities",
         height=700,
+        uirevision='density',
     )
-    return updated_fig,density_fig
+    return density_fig
 
 
-# Callback pour afficher le chemin de l'ouragan et le graphique d'évolution du vent
+# Callback pour afficher le chemin de l'ouragan et le graphique d'évolution du vent.
+# Seules les traces du chemin et le titre sont envoyés (dash.Patch): les points de départ
+# déjà affichés restent dans le navigateur.
 @dash.callback(
     [Output('map', 'figure', allow_duplicate=True),
      Output('hurricane-wind-graph', 'children')],
-    [Input('map', 'clickData'),
-     Input('date_select', 'value'),
-     Input('map', 'relayoutData')],
+    Input('map', 'clickData'),
     prevent_initial_call=True
 )
-def display_path_and_wind_graph_on_click(clickData, value, relayoutData):
+@metrics.instrument
+@figure_cache.memoize(key=lambda clickData: clicked_key(clickData))
+def display_path_and_wind_graph_on_click(clickData):
     if clickData is None:
         return dash.no_update, dash.no_update
-    selected_key = clickData['points'][0]['customdata'][0]
-    if relayoutData is not None and 'mapbox.center' in relayoutData:
-        map_center = relayoutData['mapbox.center']
-        map_zoom = relayoutData['mapbox.zoom']
-    else:
-        map_center = {'lat': 20, 'lon': -60}
-        map_zoom = 3
+    selected_key = clicked_key(clickData)
+    if selected_key is None:
+        return dash.no_update, dash.no_update
     selected_key = str(selected_key).strip()
-    df['Key'] = df['Key'].astype(str).str.strip()
-    chosen_value = set_df[(set_df['DateTime'] >= pd.to_datetime(f"{value[0]}-01-01")) & (set_df['DateTime'] <= pd.to_datetime(f"{value[1]}-12-31"))]
-    hurricane_details = df[df['Key'] == selected_key]
-    min_time = hurricane_details['DateTime'].min()
-    max_time = hurricane_details['DateTime'].max()
-    hurricane_details['time_normalized'] = (hurricane_details['DateTime'] - min_time) / (max_time - min_time)
-    path_fig = drawmap(chosen_value)
-    for i in range(len(hurricane_details) - 1):
-        path_fig.add_trace(go.Scattermapbox(
-            mode='lines',
-            lon=hurricane_details['Lon'].iloc[i:i + 2],
-            lat=hurricane_details['Lat'].iloc[i:i + 2],
-            line=dict(
-                width=4,
-                color='red' if hurricane_details['Status'].iloc[i] == 'HU' else 'blue'
-            ),
-            hoverinfo='text',
-            text=hurricane_details['Name'].iloc[i],
-            showlegend=False
-        ))
-    start_point = hurricane_details.iloc[0]
-    end_point = hurricane_details.iloc[-1]
-    path_fig.add_trace(go.Scattermapbox(
-        mode='markers',
-        lon=[start_point['Lon']],
-        lat=[start_point['Lat']],
-        marker=dict(size=12, color='green', symbol='circle'),
-        text='Start',
-        hoverinfo='text'
-    ))
-    path_fig.add_trace(go.Scattermapbox(
-        mode='markers',
-        lon=[end_point['Lon']],
-        lat=[end_point['Lat']],
-        marker=dict(size=12, color='red', symbol='x'),
-        text='End',
-        hoverinfo='text'
-    ))
-    path_fig.update_layout(
-        mapbox_style='carto-positron',
-        mapbox=dict(center=map_center, zoom=map_zoom),
-        title=f'Hurricane Path for {selected_key}'
-    )
-        
-    path_fig.update_layout(showlegend=False)
+    with metrics.phase('filter'):
+        hurricane_details = store.storm_track(selected_key)
+        storm = summary.storm(selected_key)
+    if hurricane_details is None:
+        return dash.no_update, dash.no_update
+    metrics.rows(len(hurricane_details))
+    path_patch = dash.Patch()
+    # Une trace par statut (HU / autre) au lieu d'une trace par segment, puis départ et arrivée
+    for i, trace in enumerate(path_overlay(hurricane_details, storm)):
+        path_patch['data'][BASE_TRACES + i] = trace
+    path_patch['layout']['title'] = {'text': f'Hurricane Path for {selected_key}'}
+
     # Graphique des vitesses de vent
     wind_fig = go.Figure()
     wind_fig.add_trace(go.Scatter(
@@ -197,18 +313,17 @@ def display_path_and_wind_graph_on_click(clickData, value, relayoutData):
         name='Wind Speed (km/h)',
         line=dict(color='blue')
     ))
-    # Ajouter des zones rouges pour chaque ouragan quand le status est HU
-    for i in range(len(hurricane_details)):
-        if hurricane_details['Status'].iloc[i] == 'HU':
-            wind_fig.add_vrect(
-                x0=hurricane_details['DateTime'].iloc[i],
-                x1=hurricane_details['DateTime'].iloc[i + 1] if i + 1 < len(hurricane_details) else hurricane_details['DateTime'].iloc[i],
-                fillcolor='red',
-                opacity=0.2,
-                layer='below',
-                line_width=0
-            )
-                
+    # Ajouter des zones rouges quand le status est HU (une zone par période continue)
+    for x0, x1 in figures.hurricane_intervals(hurricane_details):
+        wind_fig.add_vrect(
+            x0=x0,
+            x1=x1,
+            fillcolor='red',
+            opacity=0.2,
+            layer='below',
+            line_width=0
+        )
+
     wind_fig.add_trace(go.Scatter(
         x=[None],
         y=[None],
@@ -217,116 +332,131 @@ def display_path_and_wind_graph_on_click(clickData, value, relayoutData):
         marker=dict(color='red', size=10),
         showlegend=True
     ))
+    landfall = ', landfall' if storm['landfall'] else ''
+    # Traversées de côte détectées (NaN sans shapely: rien n'est affiché)
+    if storm['detected_landfalls'] > 0:
+        crossings = int(storm['detected_landfalls'])
+        landfall += f", {crossings} coast crossing{'s' if crossings > 1 else ''}"
     wind_fig.update_layout(
-        title='Wind Speed Over Time',
+        title=(f"Wind Speed Over Time<br><sup>Peak {storm['peak_wind_kmh']:.0f} km/h, "
+               f"{storm['hu_hours']:.0f} h as hurricane, {storm['track_km']:.0f} km{landfall}</sup>"),
         xaxis_title='Date',
         yaxis_title='Wind Speed (km/h)',
         height=400
     )
-    return path_fig, dcc.Graph(figure=wind_fig)
+    return path_patch, dcc.Graph(figure=wind_fig)
 
 
-# Callback pour effacer les données de clic
-@dash.callback(
-    [Output('map', 'clickData'), Output('map', 'figure', allow_duplicate=True)],
-    [Input('clear-btn', 'n_clicks'),
-     Input('date_select', 'value')],
+# Mémorise la vue de la carte dans le navigateur (voir assets/map.js)
+dash.clientside_callback(
+    ClientsideFunction(namespace='map', function_name='viewport'),
+    [Output('map-view-state', 'data'),
+     Output('map-viewport', 'data')],
+    Input('map', 'relayoutData'),
+    State('map', 'figure'),
     prevent_initial_call=True
 )
-def clear_click_data(n_clicks, value):
-    if n_clicks > 0:
-        chosen_value = set_df[(set_df['DateTime'] >= pd.to_datetime(f"{value[0]}-01-01")) & (
-                    set_df['DateTime'] <= pd.to_datetime(f"{value[1]}-12-31"))]
-        to_ret = drawmap(chosen_value)
-        to_ret.update_layout(
-            mapbox_style='carto-positron',
-            title=f'Hurricane Path',
-            height=700,
-            mapbox=dict(
-                center={'lat': 20, 'lon': -60},
-                zoom=3
-            ),
-            coloraxis_showscale=False
-        )
-        return None, to_ret
-    return dash.no_update, dash.no_update
 
 
-# Fonction pour dessiner la carte
-def drawmap(dfDraw):
+# Zone sélectionnée au lasso ou au rectangle, réduite à sa géométrie (voir assets/map.js)
+dash.clientside_callback(
+    ClientsideFunction(namespace='map', function_name='region'),
+    Output('map-region', 'data'),
+    Input('map', 'selectedData'),
+    prevent_initial_call=True
+)
+
+
+# Callback pour effacer les données de clic: retire le chemin et recentre, côté navigateur
+dash.clientside_callback(
+    ClientsideFunction(namespace='map', function_name='clear'),
+    [Output('map', 'clickData'),
+     Output('map', 'figure', allow_duplicate=True),
+     Output('map-view-state', 'data', allow_duplicate=True)],
+    Input('clear-btn', 'n_clicks'),
+    State('map', 'figure'),
+    prevent_initial_call=True
+)
+
+
+# Fonction pour dessiner la carte: toujours BASE_TRACES traces (points, clusters),
+# éventuellement vides, pour que les traces du chemin gardent leur position
+def drawmap(dfDraw, clusters=None):
     updated_fig = go.Figure()
     updated_fig.data = []
 
-    dfDraw['Color'] = dfDraw['Status'].apply(
-        lambda x: 'red' if x == 'HU' else 'green')
+    # Couleur calculée à part: dfDraw est une vue partagée du store, on ne la modifie pas
+    colors = np.where(dfDraw['Status'] == 'HU', 'red', 'green')
 
     updated_fig.add_trace(go.Scattermapbox(
         mode='markers',
         lon=dfDraw['Lon'],
         lat=dfDraw['Lat'],
-        marker=dict(size=7, color=dfDraw['Color']),
-        text=(
-                'Name: ' + dfDraw['Name'] + '<br>' +
-                'Key: ' + dfDraw['Key'] + '<br>' +
-                'DateTime: ' + dfDraw['DateTime'].dt.strftime('%Y-%m-%d %H:%M:%S') + '<br>' +
-                'Wind: ' + dfDraw['Wind'].astype(str) + '<br>' +
-                'Pressure: ' + dfDraw['Pressure'].astype(str)
-        ),
+        marker=dict(size=7, color=colors),
+        text=dfDraw['hover'],
         hoverinfo='text',
-        customdata=dfDraw[['Key', 'DateTime', 'Wind', 'Pressure']].values
+        customdata=hover_customdata(dfDraw)
     ))
+    updated_fig.add_trace(cluster_trace(clusters) if clusters is not None else empty_trace())
 
     return updated_fig
 
 
-layout = html.Div(children=[
-    html.H3('Maps', className='text-center mt-3'),
+# Layout of the page (a function: the data is loaded by the first call)
+def layout(**kwargs):
+    begin_date, end_date, fig, density_fig = initial_figures()
+    return html.Div(children=[
+        html.H3('Maps', className='text-center mt-3'),
 
-    html.Div(className='Input', children=[
-        html.P('This page displays the starting points of hurricanes on a map.'),
-        html.P('You can select a date range to display the hurricanes that started in that range. It will change both maps.'),
-        html.P('Click on a hurricane to see its path.'),
-        html.P('Click on the "Clear Selection" button to clear the selected hurricane path.'),
-    ]),
+        html.Div(className='Input', children=[
+            html.P('This page displays the starting points of hurricanes on a map.'),
+            html.P('You can select a date range to display the hurricanes that started in that range. It will change both maps.'),
+            html.P('Click on a hurricane to see its path.'),
+            html.P('Use the box or lasso select tool to keep only the hurricanes whose path crosses an area; double-click the map to remove it.'),
+            html.P('Click on the "Clear Selection" button to clear the selected hurricane path.'),
+        ]),
 
-    # Date range slider
-    html.Div(className='RadioButton mt-3', children=[
-        html.Label('Select Date Range:', className="label"),
-        dcc.RangeSlider(begin_date, end_date, step=1,
-                        marks={str(year): str(year) for year in range(begin_date, end_date + 1, 10)},
-                        value=[begin_date, end_date], allowCross=False, id='date_select',
-                        tooltip={'placement': 'bottom', 'always_visible': True}),
-        html.Button("Clear Selection", id="clear-btn", className="btn btn-primary", n_clicks=0),
-    ]),
+        # Date range slider
+        html.Div(className='RadioButton mt-3', children=[
+            html.Label('Select Date Range:', className="label"),
+            dcc.RangeSlider(begin_date, end_date, step=1,
+                            marks={str(year): str(year) for year in range(begin_date, end_date + 1, 10)},
+                            value=[begin_date, end_date], allowCross=False, id='date_select',
+                            tooltip={'placement': 'bottom', 'always_visible': True}),
+            html.Button("Clear Selection", id="clear-btn", className="btn btn-primary", n_clicks=0),
+        ]),
 
-    dcc.Graph(id='map', figure=fig, config={'scrollZoom': True, 'displayModeBar': True}),
-    html.Div(id='output-container-date-picker-range'),
+        dcc.Graph(id='map', figure=fig, config={'scrollZoom': True, 'displayModeBar': True}),
+        dcc.Store(id='map-view-state'),
+        dcc.Store(id='map-viewport'),
+        dcc.Store(id='map-region'),
+        html.Div(id='output-container-date-picker-range'),
 
-    # Conteneur pour le graphique d'évolution du vent
-    html.Div(id='hurricane-wind-graph', children=[]),
+        # Conteneur pour le graphique d'évolution du vent
+        html.Div(id='hurricane-wind-graph', children=[]),
 
-    html.Div(className='separator'),
-    html.H3('Heatmap', className='text-center mt-3'),
+        html.Div(className='separator'),
+        html.H3('Heatmap', className='text-center mt-3'),
 
-    html.Div(className='RadioButton mt-3', children=[
-        html.P('This section displays the density of hurricanes on a map.'),
-        html.P('The color intensity represents the number of hurricanes in a specific area.'),
-    ]),
+        html.Div(className='RadioButton mt-3', children=[
+            html.P('This section displays the density of hurricanes on a map.'),
+            html.P('The color intensity represents the number of hurricanes in a specific area.'),
+        ]),
 
-    # Graphique de densité
-    # Add padding to the density map with bootstrap
-    html.Div(dcc.Graph(id='density-map', figure=density_fig, config={'scrollZoom': True, 'displayModeBar': True}),
-             className='p-3 mt-3'),
+        # Graphique de densité
+        # Add padding to the density map with bootstrap
+        html.Div(dcc.Graph(id='density-map', figure=density_fig, config={'scrollZoom': True, 'displayModeBar': True}),
+                 className='p-3 mt-3'),
 
 
-    html.Footer(className='home-footer', children=[
-        html.Div(className='separator'),
-        html.Div(className='container', children=[
-            html.P('© 2024 - HES-SO Master. All rights reserved.', className='text-center'),
-            html.Div(className='text-center', children=[
-                html.Img(src='/assets/images/HES_SO_Logo.png', className='hesso-logo-footer'),
+        html.Footer(className='home-footer', children=[
+            html.Div(className='separator'),
+            html.Div(className='container', children=[
+                html.P('© 2024 - HES-SO Master. All rights reserved.', className='text-center'),
+                html.Div(className='text-center', children=[
+                    html.Img(src='/assets/images/HES_SO_Logo.png', className='hesso-logo-footer'),
+                ]),
+                html.P('MA-VI Project - Telley Cyril / Saucy Quentin / Altin Hajda', className='text-center'),
             ]),
-            html.P('MA-VI Project - Telley Cyril / Saucy Quentin / Altin Hajda', className='text-center'),
         ]),
-    ]),
-])
\ No newline at end of file
+    ])
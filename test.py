@@ -3,6 +3,10 @@ import plotly.graph_objects as go
 import dash
 from dash import dcc, html
 from dash.dependencies import Input, Output
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dashboard'))
+from core import figures
 dfDevastatorAt = pd.read_csv("data/"+"AL.csv")
 dfDevastatorEP = pd.read_csv("data/"+"EP.csv")
 df = [dfDevastatorAt,dfDevastatorEP]
@@ -131,20 +135,7 @@ def display_path_on_click(clickData, value,relayoutData):
     hurricane_details['Color'] = hurricane_details['Status'].apply(
         lambda x: 'red' if x == 'HU' else 'blue')
 
-    for i in range(len(hurricane_details) - 1):
-        path_fig.add_trace(go.Scattermapbox(
-            mode='lines',
-            lon=hurricane_details['Lon'].iloc[i:i + 2],  # Use two consecutive points
-            lat=hurricane_details['Lat'].iloc[i:i + 2],  # Use two consecutive points
-            line=dict(
-                width=4,
-                color='red' if hurricane_details['Status'].iloc[i] == 'HU' else 'blue'
-                # Assign color based on condition
-            ),
-            hoverinfo='text',
-            text=hurricane_details['Name'].iloc[i],  # Add name for hover text
-            showlegend=False
-        ))
+    path_fig.add_traces(figures.path_traces(hurricane_details))
     start_point = hurricane_details.iloc[0]
     end_point = hurricane_details.iloc[-1]
 